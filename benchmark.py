@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+Scenario = Tuple[str, str, Dict[str, Any]]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def default_scenarios() -> List[Scenario]:
+    from fixtures import store
+
+    project = next(iter(store.projects.values()))
+    slug = project.slug
+    tasks = f"/api/project/{slug}/tasks"
+    sections = [section.id for section in project.sections[:2]]
+    engine = store.engines[slug]
+    last_page = max(1, (len(engine) + 49) // 50)
+    return [
+        ("projects", "/api/projects", {"status": project.status.name}),
+        ("project", f"/api/projects/{slug}", {}),
+        ("tasks", tasks, {}),
+        ("tasks_section", tasks, {"section": sections[:1]}),
+        (
+            "tasks_sections_responsible",
+            tasks,
+            {"section": sections, "responsible": project.responsibles[0].id},
+        ),
+        (
+            "tasks_release_status",
+            tasks,
+            {"release": project.releases[0].id, "status": project.statuses[0].id},
+        ),
+        ("tasks_last_page", tasks, {"perPage": 50, "page": last_page}),
+        ("tasks_large_page", tasks, {"perPage": 500}),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await client.get(path, params=params)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def start_uvicorn(app) -> Tuple[str, Any, threading.Thread]:
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import app
+
+    scenarios = default_scenarios()
+    if args.routes:
+        scenarios = [scenario for scenario in scenarios if scenario[0] in args.routes]
+
+    server = thread = None
+    if args.mode == "asgi":
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://mock"
+        )
+    else:
+        base_url = args.url
+        if base_url is None:
+            base_url, server, thread = start_uvicorn(app)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits)
+
+    results = {}
+    try:
+        async with client:
+            for name, path, params in scenarios:
+                result = await run_scenario(
+                    client, path, params, args.requests, args.concurrency, args.warmup
+                )
+                result["path"] = path
+                result["params"] = params
+                results[name] = result
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+
+    return {
+        "mode": args.mode,
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        # RSS is only meaningful when the app runs in this process.
+        "peak_rss_mb": peak_rss_mb() if args.url is None else None,
+        "routes": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the mock API routes")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument(
+        "--url",
+        help="benchmark a running server started with the same MOCK_* settings",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--routes", nargs="*", help="only run these scenarios")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+    if args.url is not None:
+        args.mode = "uvicorn"
+
+    report = json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import asyncio
+import gzip
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional, Set, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from metrics import record_phases
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    from fixtures import FixtureStore
+
+# Smaller bodies are sent as they are; below this compression saves less
+# than the round trip costs, and may not save anything at all.
+MIN_COMPRESS = 1024
+# Larger bodies are compressed in a worker thread the first time each
+# variant is sent: at the levels below a multi-megabyte page takes 100 ms
+# or more, which would stall every request in flight.
+INLINE_COMPRESS = 64 * 1024
+
+
+def gzip_compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def brotli_compress(body: bytes) -> bytes:
+    return brotli.compress(body, quality=6)
+
+
+# Every variant is compressed once per cached payload, so levels lean
+# towards size over speed. Ordered by server preference.
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = zstandard.ZstdCompressor(level=12).compress
+if brotli is not None:
+    COMPRESSORS["br"] = brotli_compress
+COMPRESSORS["gzip"] = gzip_compress
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "variants", "pending")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.variants: Dict[str, bytes] = {}
+        # Compressions running in a thread, by coding; created on first use
+        # since most entries are only ever sent small or uncompressed.
+        self.pending: Optional[Dict[str, asyncio.Future]] = None
+
+    def encoded(self, coding: str) -> bytes:
+        body = self.variants.get(coding)
+        if body is None:
+            body = self.variants[coding] = COMPRESSORS[coding](self.body)
+        return body
+
+    async def encode(self, coding: str) -> bytes:
+        # Off the event loop, once per coding however many requests for the
+        # entry arrive before it is done; shielded so a client going away
+        # does not cancel it for the others.
+        body = self.variants.get(coding)
+        if body is not None:
+            return body
+        if self.pending is None:
+            self.pending = {}
+        future = self.pending.get(coding)
+        if future is None:
+            future = self.pending[coding] = asyncio.ensure_future(
+                asyncio.to_thread(self.encoded, coding)
+            )
+            future.add_done_callback(lambda _: self.pending.pop(coding, None))
+        return await asyncio.shield(future)
+
+
+class EncodingResponse(Response):
+    # Sends a cached body's variant, compressing it off the event loop.
+    def __init__(self, entry: CachedResponse, coding: str, headers: Dict[str, str]):
+        self.entry = entry
+        self.coding = coding
+        super().__init__(media_type="application/json", headers=headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        self.body = await self.entry.encode(self.coding)
+        self.headers["content-length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        # Keys per version (their first element), so discarding a version
+        # costs its own entries rather than a scan of the whole cache.
+        self._versions: Dict[Hashable, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._versions.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest, _ = self._entries.popitem(last=False)
+            keys = self._versions[oldest[0]]
+            keys.discard(oldest)
+            if not keys:
+                del self._versions[oldest[0]]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+
+    def discard(self, *versions: str) -> None:
+        for version in versions:
+            for key in self._versions.pop(version, ()):
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+response_cache = ResponseCache(int(os.environ.get("MOCK_CACHE_SIZE", "4096")))
+
+
+def evict_project(store: "FixtureStore", slug: str) -> None:
+    # Before a project changes: drop its responses and the project list,
+    # which are keyed by the digests about to be replaced.
+    stale = [store.digest]
+    if slug in store.project_digests:
+        stale.append(store.project_digests[slug])
+    store.cache.discard(*stale)
+
+
+def make_etag(key: Hashable) -> str:
+    return '"%s"' % blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in COMPRESSORS:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return modified <= since
+
+    return False
+
+
+def cached_response(
+    request: Request,
+    store: "FixtureStore",
+    version: str,
+    key: tuple,
+    build: Callable[[], Union[bytes, BaseModel]],
+) -> Response:
+    key = (version,) + key
+    entry = store.cache.get(key)
+    if entry is None:
+        # Built before the conditional check: whether the representation
+        # is compressed, and so its ETag, depends on the body size.
+        started = time.perf_counter()
+        body = build()
+        if isinstance(body, bytes):
+            # Routes that encode directly have no separate validation step.
+            record_phases(0.0, time.perf_counter() - started)
+        else:
+            built = time.perf_counter()
+            body = body.model_dump_json().encode()
+            record_phases(built - started, time.perf_counter() - built)
+        entry = CachedResponse(body, make_etag(key))
+        store.cache.put(key, entry)
+
+    coding = None
+    if len(entry.body) >= MIN_COMPRESS:
+        coding = negotiate(request.headers.get("accept-encoding", ""))
+    # Each encoding is a distinct representation, so it gets its own
+    # strong validator.
+    etag = entry.etag if coding is None else '"%s-%s"' % (entry.etag[1:-1], coding)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": store.last_modified,
+        "Cache-Control": "no-cache",
+        # The scenario header picks a different store; see scenarios.py.
+        "Vary": "Accept-Encoding, X-Mock-Scenario",
+    }
+    modified = store.loaded_at if store.last_modified_exact else None
+    if not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    if coding is None:
+        body = entry.body
+    else:
+        headers["Content-Encoding"] = coding
+        if coding not in entry.variants and len(entry.body) >= INLINE_COMPRESS:
+            return EncodingResponse(entry, coding, headers)
+        body = entry.encoded(coding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def filter_key(values: Optional[list]) -> tuple:
+    return tuple(sorted(set(values))) if values else ()
@@ -0,0 +1,505 @@
+import json
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from itertools import accumulate, islice
+from array import array
+from datetime import date
+from typing import IO, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from engine import FIELDS, TaskEngine
+from models import Event, Project, Status, Task
+from records import TaskRow, task_row
+from timeline import EventColumns
+
+MAGIC = b"MOCKCOL1"
+ALIGN = 8
+FLUSH_BYTES = 1 << 20
+ROW_BATCH = 4096
+
+# name -> array typecode. "I" columns ending in a plain field name hold
+# references into the interned string table; *_offsets columns have one
+# more entry than rows and delimit nested lists or raw strings.
+COLUMNS = {
+    "string_offsets": "Q",
+    "string_data": "B",
+    "status_id": "I",
+    "status_name": "I",
+    "status_color": "I",
+    "project_slug": "I",
+    "project_name": "I",
+    "project_status": "I",
+    "project_digest": "I",
+    "project_statuses_offsets": "I",
+    "project_statuses": "I",
+    "project_releases_offsets": "I",
+    "release_id": "I",
+    "release_name": "I",
+    "release_comment": "I",
+    "release_released": "I",
+    "project_responsibles_offsets": "I",
+    "responsible_id": "I",
+    "responsible_full_name": "I",
+    "responsible_team": "I",
+    "project_sections_offsets": "I",
+    "section_id": "I",
+    "section_name": "I",
+    "project_tasks_offsets": "Q",
+    "task_id_offsets": "Q",
+    "task_id_data": "B",
+    "task_name": "I",
+    "task_comment": "I",
+    "task_section": "I",
+    "task_release": "I",
+    "task_status": "I",
+    "task_events_offsets": "Q",
+    "event_id_offsets": "Q",
+    "event_id_data": "B",
+    "event_responsible": "I",
+    "event_comment": "I",
+    "event_risk": "I",
+    "event_type": "I",
+    "event_started": "i",
+    "event_ended": "i",
+    "index_project": "I",
+    "index_field": "B",
+    "index_value": "I",
+    "index_start": "Q",
+    "index_length": "Q",
+    "postings": "I",
+}
+OFFSET_COLUMNS = [name for name in COLUMNS if name.endswith("_offsets")]
+
+def task_rows(tasks: Sequence[Task]) -> Iterator[TaskRow]:
+    rows = getattr(tasks, "rows", None)
+    if rows is not None:
+        yield from rows()
+        return
+    for task in tasks:
+        yield task_row(task)
+
+
+class Writer:
+    def __init__(self):
+        self.files: Dict[str, IO[bytes]] = {}
+        self.buffers: Dict[str, array] = {}
+        self.counts: Dict[str, int] = {}
+        for name, typecode in COLUMNS.items():
+            self.files[name] = tempfile.TemporaryFile()
+            self.buffers[name] = array(typecode)
+            self.counts[name] = 0
+        for name in OFFSET_COLUMNS:
+            self.buffers[name].append(0)
+        self.strings: Dict[str, int] = {}
+        self.statuses: Dict[Tuple[str, str, str], int] = {}
+
+    def extend(self, name: str, values: Iterable[int]) -> None:
+        buffer = self.buffers[name]
+        buffer.extend(values)
+        if len(buffer) * buffer.itemsize >= FLUSH_BYTES:
+            self.flush(name)
+
+    def append(self, name: str, value: int) -> None:
+        buffer = self.buffers[name]
+        buffer.append(value)
+        if len(buffer) * buffer.itemsize >= FLUSH_BYTES:
+            self.flush(name)
+
+    def flush(self, name: str) -> None:
+        buffer = self.buffers[name]
+        buffer.tofile(self.files[name])
+        self.counts[name] += len(buffer)
+        del buffer[:]
+
+    def offset(self, name: str, length: int) -> None:
+        self.offsets(name, (length,))
+
+    def intern(self, value: str) -> int:
+        ref = self.strings.get(value)
+        if ref is None:
+            ref = self.strings[value] = len(self.strings)
+            encoded = value.encode()
+            self.extend("string_data", encoded)
+            self.offset("string_offsets", len(encoded))
+        return ref
+
+    def status(self, status: Status) -> int:
+        key = (status.id, status.name, status.color)
+        ref = self.statuses.get(key)
+        if ref is None:
+            ref = self.statuses[key] = len(self.statuses)
+            self.append("status_id", self.intern(status.id))
+            self.append("status_name", self.intern(status.name))
+            self.append("status_color", self.intern(status.color))
+        return ref
+
+    def offsets(self, name: str, lengths: Iterable[int]) -> None:
+        buffer = self.buffers[name]
+        buffer.extend(accumulate(lengths, initial=buffer.pop()))
+        if len(buffer) * buffer.itemsize >= FLUSH_BYTES:
+            # The running total stays buffered as the base for the next one.
+            current = buffer.pop()
+            self.flush(name)
+            buffer.append(current)
+
+    def tasks(self, rows: List[TaskRow]) -> None:
+        intern = self.intern
+        ids = [row[0].encode() for row in rows]
+        self.extend("task_id_data", b"".join(ids))
+        self.offsets("task_id_offsets", map(len, ids))
+        self.extend("task_name", [intern(row[1]) for row in rows])
+        self.extend("task_comment", [intern(row[2]) for row in rows])
+        self.extend("task_section", [intern(row[3]) for row in rows])
+        self.extend("task_release", [intern(row[4]) for row in rows])
+        self.extend("task_status", [self.status(row[5]) for row in rows])
+        self.offsets("task_events_offsets", [len(row[6]) for row in rows])
+
+        events = [event for row in rows for event in row[6]]
+        ids = [event[0].encode() for event in events]
+        self.extend("event_id_data", b"".join(ids))
+        self.offsets("event_id_offsets", map(len, ids))
+        self.extend("event_responsible", [intern(event[1]) for event in events])
+        self.extend("event_comment", [intern(event[2]) for event in events])
+        self.extend("event_risk", [intern(event[3]) for event in events])
+        self.extend("event_type", [intern(event[4]) for event in events])
+        self.extend("event_started", [event[5] for event in events])
+        self.extend("event_ended", [event[6] for event in events])
+
+    def project(self, index: int, project: Project, engine: TaskEngine) -> None:
+        intern = self.intern
+        self.append("project_slug", intern(project.slug))
+        self.append("project_name", intern(project.name))
+        self.append("project_status", self.status(project.status))
+        self.append("project_digest", intern(engine.digest))
+        self.extend("project_statuses", [self.status(s) for s in project.statuses])
+        self.offset("project_statuses_offsets", len(project.statuses))
+        for release in project.releases:
+            self.append("release_id", intern(release.id))
+            self.append("release_name", intern(release.name))
+            self.append("release_comment", intern(release.comment))
+            self.append("release_released", intern(release.released))
+        self.offset("project_releases_offsets", len(project.releases))
+        for responsible in project.responsibles:
+            self.append("responsible_id", intern(responsible.id))
+            self.append("responsible_full_name", intern(responsible.fullName))
+            self.append("responsible_team", intern(responsible.team))
+        self.offset("project_responsibles_offsets", len(project.responsibles))
+        for section in project.sections:
+            self.append("section_id", intern(section.id))
+            self.append("section_name", intern(section.name))
+        self.offset("project_sections_offsets", len(project.sections))
+
+        if engine.deleted:
+            # Positions are written as they are, so tombstones go first.
+            engine = TaskEngine(engine.get(engine.select({})))
+        rows = task_rows(engine.tasks)
+        while True:
+            batch = list(islice(rows, ROW_BATCH))
+            if not batch:
+                break
+            self.tasks(batch)
+        self.offset("project_tasks_offsets", len(engine.tasks))
+
+        postings = self.counts["postings"] + len(self.buffers["postings"])
+        for field_code, field in enumerate(FIELDS):
+            for value, positions in engine.indexes[field].items():
+                self.append("index_project", index)
+                self.append("index_field", field_code)
+                self.append("index_value", intern(value))
+                self.append("index_start", postings)
+                self.append("index_length", len(positions))
+                self.extend("postings", positions)
+                postings += len(positions)
+
+    def finish(self, path: str) -> None:
+        for name in COLUMNS:
+            self.flush(name)
+        relative = {}
+        position = 0
+        for name, typecode in COLUMNS.items():
+            size = self.counts[name] * array(typecode).itemsize
+            relative[name] = (typecode, position, self.counts[name])
+            position += size + (-size % ALIGN)
+
+        # Column offsets are absolute, so the header size feeds back into
+        # them; grow the data start until the header fits in front of it.
+        start = 0
+        while True:
+            layout = {
+                name: [typecode, start + offset, count]
+                for name, (typecode, offset, count) in relative.items()
+            }
+            header = json.dumps({"version": 1, "columns": layout}).encode()
+            needed = len(MAGIC) + 8 + len(header)
+            needed += -needed % ALIGN
+            if needed <= start:
+                break
+            start = needed
+        header += b" " * (start - len(MAGIC) - 8 - len(header))
+
+        with open(path, "wb") as output:
+            output.write(MAGIC)
+            output.write(struct.pack("<Q", len(header)))
+            output.write(header)
+            for name, typecode in COLUMNS.items():
+                source = self.files[name]
+                source.seek(0)
+                shutil.copyfileobj(source, output)
+                source.close()
+                size = self.counts[name] * array(typecode).itemsize
+                output.write(b"\0" * (-size % ALIGN))
+
+
+def write(path: str, projects: Iterable[Project], engines: Mapping[str, TaskEngine]):
+    writer = Writer()
+    for index, project in enumerate(projects):
+        writer.project(index, project, engines[project.slug])
+    writer.finish(path)
+
+
+class ColumnarFile:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar fixture file")
+        (length,) = struct.unpack_from("<Q", self.mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(self.mmap[start : start + length]))
+        view = memoryview(self.mmap)
+        self.columns: Dict[str, memoryview] = {}
+        for name, (typecode, offset, count) in header["columns"].items():
+            size = count * array(typecode).itemsize
+            self.columns[name] = view[offset : offset + size].cast(typecode)
+        self._strings: Dict[int, str] = {}
+
+    def __getattr__(self, name: str) -> memoryview:
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def string(self, ref: int) -> str:
+        value = self._strings.get(ref)
+        if value is None:
+            offsets = self.string_offsets
+            data = self.string_data
+            value = bytes(data[offsets[ref] : offsets[ref + 1]]).decode()
+            self._strings[ref] = value
+        return value
+
+    def raw(self, prefix: str, index: int) -> str:
+        offsets = self.columns[prefix + "_offsets"]
+        data = self.columns[prefix + "_data"]
+        return bytes(data[offsets[index] : offsets[index + 1]]).decode()
+
+
+class ColumnarTasks(Sequence[Task]):
+    def __init__(self, file: ColumnarFile, start: int, stop: int, statuses: List[Status]):
+        self.file = file
+        self.start = start
+        self.size = stop - start
+        self.statuses = statuses
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.size))]
+        if position < 0:
+            position += self.size
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        file = self.file
+        string = file.string
+        index = self.start + position
+        offsets = file.task_events_offsets
+        return Task.model_construct(
+            id=file.raw("task_id", index),
+            name=string(file.task_name[index]),
+            comment=string(file.task_comment[index]),
+            section=string(file.task_section[index]),
+            release=string(file.task_release[index]),
+            status=self.statuses[file.task_status[index]],
+            events=[
+                Event.model_construct(
+                    id=file.raw("event_id", event),
+                    responsible=string(file.event_responsible[event]),
+                    comment=string(file.event_comment[event]),
+                    risk=string(file.event_risk[event]),
+                    type=string(file.event_type[event]),
+                    startedAt=date.fromordinal(file.event_started[event]),
+                    endedAt=date.fromordinal(file.event_ended[event]),
+                )
+                for event in range(offsets[index], offsets[index + 1])
+            ],
+        )
+
+
+    def row(self, position: int) -> TaskRow:
+        file = self.file
+        string = file.string
+        index = self.start + position
+        offsets = file.task_events_offsets
+        return (
+            file.raw("task_id", index),
+            string(file.task_name[index]),
+            string(file.task_comment[index]),
+            string(file.task_section[index]),
+            string(file.task_release[index]),
+            self.statuses[file.task_status[index]],
+            [
+                (
+                    file.raw("event_id", event),
+                    string(file.event_responsible[event]),
+                    string(file.event_comment[event]),
+                    string(file.event_risk[event]),
+                    string(file.event_type[event]),
+                    file.event_started[event],
+                    file.event_ended[event],
+                )
+                for event in range(offsets[index], offsets[index + 1])
+            ],
+        )
+
+    def nbytes(self) -> int:
+        # Columns are mapped file pages: shared between processes and
+        # reclaimable by the OS, so they count for nothing here.
+        return 0
+
+    def ids(self) -> Iterator[str]:
+        raw = self.file.raw
+        indexes = range(self.start, self.start + self.size)
+        return (raw("task_id", index) for index in indexes)
+
+    def text_postings(self) -> Dict[str, array]:
+        # search.text_postings, grouped by interned string reference so each
+        # distinct text is decoded once.
+        file = self.file
+        start, stop = self.start, self.start + self.size
+        grouped: Dict[int, array] = {}
+        for column in (file.task_name, file.task_comment):
+            for position, ref in enumerate(column[start:stop]):
+                positions = grouped.get(ref)
+                if positions is None:
+                    positions = grouped[ref] = array("I")
+                positions.append(position)
+
+        offsets = file.task_events_offsets
+        comment = file.event_comment
+        for position in range(self.size):
+            index = start + position
+            for ref in set(comment[offsets[index] : offsets[index + 1]]):
+                positions = grouped.get(ref)
+                if positions is None:
+                    positions = grouped[ref] = array("I")
+                positions.append(position)
+        return {file.string(ref): positions for ref, positions in grouped.items()}
+
+    def event_columns(self) -> EventColumns:
+        # timeline.event_columns; string references are renumbered densely
+        # so they can index the label lists.
+        file = self.file
+        offsets = file.task_events_offsets
+        first, last = offsets[self.start], offsets[self.start + self.size]
+        groups = {}
+        for group, column in (
+            ("risk", file.event_risk),
+            ("type", file.event_type),
+            ("responsible", file.event_responsible),
+        ):
+            refs = column[first:last]
+            codes = {ref: code for code, ref in enumerate(set(refs))}
+            groups[group] = (
+                array("I", map(codes.__getitem__, refs)),
+                [file.string(ref) for ref in codes],
+            )
+        return file.event_started[first:last], file.event_ended[first:last], groups
+
+
+def nested(file: ColumnarFile, offsets: str, index: int) -> range:
+    column = file.columns[offsets]
+    return range(column[index], column[index + 1])
+
+
+def load(path: str) -> Tuple[List[Project], Dict[str, TaskEngine]]:
+    file = ColumnarFile(path)
+    string = file.string
+    statuses = [
+        Status.model_construct(
+            id=string(file.status_id[ref]),
+            name=string(file.status_name[ref]),
+            color=string(file.status_color[ref]),
+        )
+        for ref in range(len(file.status_id))
+    ]
+
+    indexes: List[Dict[str, Dict[str, memoryview]]] = [
+        {field: {} for field in FIELDS} for _ in range(len(file.project_slug))
+    ]
+    postings = file.postings
+    for entry in range(len(file.index_project)):
+        start = file.index_start[entry]
+        indexes[file.index_project[entry]][FIELDS[file.index_field[entry]]][
+            string(file.index_value[entry])
+        ] = postings[start : start + file.index_length[entry]]
+
+    projects = []
+    engines = {}
+    for index in range(len(file.project_slug)):
+        project = Project.model_validate(
+            {
+                "slug": string(file.project_slug[index]),
+                "name": string(file.project_name[index]),
+                "status": statuses[file.project_status[index]],
+                "statuses": [
+                    statuses[file.project_statuses[ref]]
+                    for ref in nested(file, "project_statuses_offsets", index)
+                ],
+                "releases": [
+                    {
+                        "id": string(file.release_id[ref]),
+                        "name": string(file.release_name[ref]),
+                        "comment": string(file.release_comment[ref]),
+                        "released": string(file.release_released[ref]),
+                    }
+                    for ref in nested(file, "project_releases_offsets", index)
+                ],
+                "responsibles": [
+                    {
+                        "id": string(file.responsible_id[ref]),
+                        "fullName": string(file.responsible_full_name[ref]),
+                        "team": string(file.responsible_team[ref]),
+                    }
+                    for ref in nested(file, "project_responsibles_offsets", index)
+                ],
+                "sections": [
+                    {
+                        "id": string(file.section_id[ref]),
+                        "name": string(file.section_name[ref]),
+                    }
+                    for ref in nested(file, "project_sections_offsets", index)
+                ],
+            }
+        )
+        tasks = nested(file, "project_tasks_offsets", index)
+        projects.append(project)
+        engines[project.slug] = TaskEngine(
+            ColumnarTasks(file, tasks.start, tasks.stop, statuses),
+            indexes=indexes[index],
+            digest=string(file.project_digest[index]),
+        )
+    return projects, engines
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python columnar.py OUTPUT  (dumps the MOCK_* fixture store)")
+
+    from fixtures import store
+
+    write(sys.argv[1], store.projects.values(), store.engines)
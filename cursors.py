@@ -0,0 +1,50 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+
+def encode_cursor(kind: str, key: Union[int, str]) -> str:
+    raw = f"{kind}:{key}".encode()
+    return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def split_cursor(kind: str, cursor: str) -> str:
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if prefix != kind or not value:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def decode_position_cursor(
+    kind: str, cursor: Optional[str]
+) -> Optional[Tuple[int, str]]:
+    # For cursors holding the position of the last item along with its key,
+    # to find the item again once positions have moved; an empty cursor
+    # starts keyset paging.
+    if cursor is None:
+        return None
+    if not cursor:
+        return -1, ""
+    position, _, key = split_cursor(kind, cursor).partition(":")
+    try:
+        after = int(position)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if after < 0 or not key:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after, key
+
+
+def decode_key_cursor(kind: str, cursor: Optional[str]) -> Optional[str]:
+    # For cursors holding the key of the last item rather than a position;
+    # an empty cursor starts keyset paging.
+    if cursor is None:
+        return None
+    if not cursor:
+        return ""
+    return split_cursor(kind, cursor)
@@ -0,0 +1,532 @@
+import asyncio
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from hashlib import blake2b
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from models import Task
+from records import TaskRow, task_json, task_row
+from startup import phase
+from timeline import TimelineIndex
+
+if TYPE_CHECKING:
+    from search import SearchIndex
+
+FIELDS = ("section", "release", "responsible", "status")
+
+# Selections at or below this size are kept as sorted position arrays,
+# larger ones as bitmaps so that AND/OR/count stay in C. Converting costs
+# about a microsecond per position, so the limit stays low enough for
+# search-as-you-type to remain sub-millisecond.
+ARRAY_LIMIT = 256
+CHUNK_BYTES = 512
+
+Filters = Mapping[str, Sequence[str]]
+
+# Heap held by a validated Task and by each of its Events, as measured with
+# tracemalloc; nbytes estimates model-backed task sequences from these.
+TASK_BYTES = 1000
+EVENT_BYTES = 1500
+
+
+def task_keys(task: Task) -> Iterator[Tuple[str, str]]:
+    yield "section", task.section
+    yield "release", task.release
+    yield "status", task.status.id
+    for responsible in {event.responsible for event in task.events}:
+        yield "responsible", responsible
+
+
+def to_bitmap(positions: Iterable[int], size: int) -> int:
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bitmap_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def iter_bitmap(data: bytes, offset: int = 0, start: int = 0) -> Iterator[int]:
+    # Yields set bit positions >= start, skipping the first offset of them.
+    # Whole chunks are skipped by popcount, so seeking never walks bits.
+    first = start >> 3
+    for begin in range(first, len(data), CHUNK_BYTES):
+        chunk = int.from_bytes(data[begin : begin + CHUNK_BYTES], "little")
+        if begin == first:
+            chunk &= -1 << (start & 7)
+        found = chunk.bit_count()
+        if found <= offset:
+            offset -= found
+            continue
+        base = begin * 8
+        while chunk:
+            low = chunk & -chunk
+            chunk ^= low
+            if offset:
+                offset -= 1
+            else:
+                yield base + low.bit_length() - 1
+
+
+class Selection:
+    __slots__ = ("count", "positions", "data")
+
+    def __init__(
+        self, count: int, positions: Optional[Sequence[int]] = None, data: bytes = b""
+    ):
+        self.count = count
+        self.positions = positions
+        self.data = data
+
+    def slice(self, offset: int, limit: int) -> List[int]:
+        if self.positions is not None:
+            return list(self.positions[offset : offset + limit])
+        return list(islice(iter_bitmap(self.data, offset), limit))
+
+    def after(self, position: int, limit: int) -> List[int]:
+        if self.positions is not None:
+            start = bisect_right(self.positions, position)
+            return list(self.positions[start : start + limit])
+        return list(islice(iter_bitmap(self.data, start=position + 1), limit))
+
+    def __iter__(self) -> Iterator[int]:
+        if self.positions is not None:
+            return iter(self.positions)
+        return iter_bitmap(self.data)
+
+
+def with_position(postings: Sequence[int], position: int) -> array:
+    # Postings are replaced, never edited in place: cached selections and
+    # running exports may still be iterating the old ones.
+    updated = array("I", postings)
+    index = bisect_left(updated, position)
+    if index == len(updated) or updated[index] != position:
+        updated.insert(index, position)
+    return updated
+
+
+def without_position(postings: Sequence[int], position: int) -> array:
+    updated = array("I", postings)
+    index = bisect_left(updated, position)
+    if index < len(updated) and updated[index] == position:
+        del updated[index]
+    return updated
+
+
+class TaskOverlay(Sequence[Task]):
+    # Edited and appended tasks layered over a read-only (generated,
+    # columnar) sequence.
+    def __init__(self, base: Sequence[Task]):
+        self.base = base
+        self.size = len(base)
+        self.changed: Dict[int, Task] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        task = self.changed.get(position)
+        return task if task is not None else self.base[position]
+
+    def row(self, position: int) -> TaskRow:
+        task = self.changed.get(position)
+        if task is not None:
+            return task_row(task)
+        row = getattr(self.base, "row", None)
+        return row(position) if row is not None else task_row(self.base[position])
+
+    def rows(self) -> Iterator[TaskRow]:
+        return map(self.row, range(len(self)))
+
+
+def build_indexes(tasks: Iterable[Task]) -> Dict[str, Dict[str, array]]:
+    indexes: Dict[str, Dict[str, array]] = {field: {} for field in FIELDS}
+    for position, task in enumerate(tasks):
+        for field, value in task_keys(task):
+            postings = indexes[field].get(value)
+            if postings is None:
+                postings = indexes[field][value] = array("I")
+            postings.append(position)
+    return indexes
+
+
+def postings_bytes(postings) -> int:
+    if isinstance(postings, int):
+        return postings.bit_length() // 8
+    return len(postings) * getattr(postings, "itemsize", 8)
+
+
+def task_ids(tasks: Sequence[Task]) -> Iterable[str]:
+    ids = getattr(tasks, "ids", None)
+    return ids() if ids is not None else (task.id for task in tasks)
+
+
+def base_ids(tasks: Sequence[Task]) -> Dict[str, int]:
+    return {task_id: position for position, task_id in enumerate(task_ids(tasks))}
+
+
+def tasks_digest(tasks: Iterable[Task]) -> str:
+    value = blake2b(digest_size=16)
+    for task in tasks:
+        value.update(task.model_dump_json().encode())
+    return value.hexdigest()
+
+
+class TaskEngine:
+    def __init__(
+        self,
+        tasks: Sequence[Task],
+        indexes: Optional[Dict[str, Dict[str, array]]] = None,
+        digest: Optional[str] = None,
+        cache_size: int = 256,
+        search: Optional["SearchIndex"] = None,
+        timeline: Optional[TimelineIndex] = None,
+    ):
+        self.tasks = tasks
+        with phase("engine indexes"):
+            self.indexes = indexes if indexes is not None else build_indexes(tasks)
+        with phase("engine digest"):
+            self.digest = digest if digest is not None else tasks_digest(tasks)
+        # Built on first use, unless given: together they take seconds on a
+        # million tasks, which would undo the instant load of columnar files.
+        self._search = search
+        self._timeline = timeline
+
+        self.cache_size = cache_size
+        # Deleted positions stay in place as tombstones, so positions held
+        # by cursors and selections never shift; this bitmap masks them.
+        self.deleted = 0
+        self._ids: Optional[Dict[str, int]] = None
+        # Index builds running in a thread, by name; concurrent callers all
+        # await the same one.
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._bitmaps: Dict[Tuple[str, str], int] = {}
+        self._selections: "OrderedDict[tuple, Selection]" = OrderedDict()
+
+    def __len__(self) -> int:
+        # Live tasks; positions run up to len(self.tasks).
+        return len(self.tasks) - self.deleted.bit_count()
+
+    def nbytes(self) -> int:
+        # Estimated heap held by the tasks and every index over them.
+        tasks = self.tasks
+        base = tasks.base if isinstance(tasks, TaskOverlay) else tasks
+        nbytes = getattr(base, "nbytes", None)
+        if nbytes is not None:
+            size = nbytes()
+        else:
+            events = sum(len(task.events) for task in base)
+            size = len(base) * TASK_BYTES + events * EVENT_BYTES
+        if base is not tasks:
+            size += len(tasks.changed) * TASK_BYTES
+        for index in self.indexes.values():
+            size += sum(map(postings_bytes, index.values()))
+        if self._search is not None:
+            size += sum(map(postings_bytes, self._search.postings.values()))
+        size += sum(map(postings_bytes, self._bitmaps.values()))
+        return size
+
+    @property
+    def search(self) -> "SearchIndex":
+        if self._search is None:
+            search = self._build_search()
+            self._catch_up(search.update)
+            self._search = search
+        return self._search
+
+    @property
+    def timeline(self) -> TimelineIndex:
+        if self._timeline is None:
+            timeline = self._build_timeline()
+            self._catch_up(lambda _, previous, task: timeline.update(previous, task))
+            self._timeline = timeline
+        return self._timeline
+
+    def _build_search(self) -> "SearchIndex":
+        from search import SearchIndex
+
+        with phase("search index"):
+            return SearchIndex.build(self._base())
+
+    def _build_timeline(self) -> TimelineIndex:
+        with phase("timeline index"):
+            return TimelineIndex.build(self._base())
+
+    def _catch_up(
+        self, update: Callable[[int, Optional[Task], Optional[Task]], None]
+    ) -> None:
+        # Layers the writes made so far over an index of the base sequence.
+        tasks = self.tasks
+        if not isinstance(tasks, TaskOverlay):
+            return
+        base = tasks.base
+        for position, task in sorted(tasks.changed.items()):
+            update(position, base[position] if position < len(base) else None, task)
+        for position in iter_bitmap(bitmap_bytes(self.deleted)):
+            update(position, tasks[position], None)
+
+    def _load(self, name: str, build: Callable[[], Any]) -> Awaitable[Any]:
+        # Builds in a thread, once however many requests are waiting for it;
+        # shielded so one of them going away does not cancel it for the rest.
+        future = self._loading.get(name)
+        if future is None:
+            future = self._loading[name] = asyncio.ensure_future(
+                asyncio.to_thread(build)
+            )
+            future.add_done_callback(lambda _: self._loading.pop(name, None))
+        return asyncio.shield(future)
+
+    async def load_search(self) -> "SearchIndex":
+        # The base sequence is read-only, so the build runs off the loop;
+        # writes landing meanwhile are caught up here, by the first waiter.
+        if self._search is None:
+            search = await self._load("search", self._build_search)
+            if self._search is None:
+                self._catch_up(search.update)
+                self._search = search
+        return self._search
+
+    async def load_timeline(self) -> TimelineIndex:
+        if self._timeline is None:
+            timeline = await self._load("timeline", self._build_timeline)
+            if self._timeline is None:
+                self._catch_up(
+                    lambda _, previous, task: timeline.update(previous, task)
+                )
+                self._timeline = timeline
+        return self._timeline
+
+    def _bitmap(self, field: str, value: str) -> int:
+        key = (field, value)
+        bits = self._bitmaps.get(key)
+        if bits is None:
+            postings = self.indexes[field].get(value, ())
+            bits = self._bitmaps[key] = to_bitmap(postings, len(self.tasks))
+        return bits
+
+    def _select(
+        self, filters: Tuple[Tuple[str, Tuple[str, ...]], ...], terms: Tuple[str, ...]
+    ) -> Selection:
+        if not filters and not terms:
+            size = len(self.tasks)
+            if not self.deleted:
+                return Selection(size, range(size))
+            return self._selection(((1 << size) - 1) & ~self.deleted)
+
+        if not terms and len(filters) == 1 and len(filters[0][1]) == 1:
+            field, (value,) = filters[0]
+            postings = self.indexes[field].get(value, ())
+            return Selection(len(postings), postings)
+
+        # Smallest field first, so an empty intersection is found early.
+        ordered = sorted(
+            filters,
+            key=lambda item: sum(
+                len(self.indexes[item[0]].get(value, ())) for value in item[1]
+            ),
+        )
+        bits = -1
+        for term in terms:
+            bits &= self.search.bitmap(term)
+            if not bits:
+                return Selection(0, ())
+        for field, values in ordered:
+            union = 0
+            for value in values:
+                union |= self._bitmap(field, value)
+            bits &= union
+            if not bits:
+                return Selection(0, ())
+        return self._selection(bits)
+
+    def _selection(self, bits: int) -> Selection:
+        count = bits.bit_count()
+        data = bitmap_bytes(bits)
+        if count <= ARRAY_LIMIT:
+            return Selection(count, array("I", iter_bitmap(data)))
+        return Selection(count, data=data)
+
+    def select(self, filters: Filters, terms: Sequence[str] = ()) -> Selection:
+        key = tuple(
+            (field, tuple(sorted(set(values))))
+            for field, values in sorted(filters.items())
+            if values
+        )
+        terms = tuple(sorted(set(terms)))
+        if terms:
+            key += (("q", terms),)
+        selection = self._selections.get(key)
+        if selection is not None:
+            self._selections.move_to_end(key)
+            return selection
+
+        selection = self._select(key[:-1] if terms else key, terms)
+        self._selections[key] = selection
+        while len(self._selections) > self.cache_size:
+            self._selections.popitem(last=False)
+        return selection
+
+    def page(
+        self, filters: Filters, offset: int, limit: int, terms: Sequence[str] = ()
+    ) -> Tuple[int, List[int]]:
+        selection = self.select(filters, terms)
+        return selection.count, selection.slice(offset, limit)
+
+    def seek(
+        self, filters: Filters, after: int, limit: int, terms: Sequence[str] = ()
+    ) -> Tuple[int, List[int]]:
+        selection = self.select(filters, terms)
+        return selection.count, selection.after(after, limit)
+
+    def counts(self, field: str) -> Dict[str, int]:
+        # Tasks per value, straight from the posting lengths.
+        return {
+            value: len(postings)
+            for value, postings in self.indexes[field].items()
+            if postings
+        }
+
+    def get(self, positions: Iterable[int]) -> List[Task]:
+        tasks = self.tasks
+        return [tasks[position] for position in positions]
+
+    def rows(self, positions: Iterable[int]) -> List[TaskRow]:
+        # Task sequences backed by columns hand out rows without building
+        # Task models at all.
+        row = getattr(self.tasks, "row", None)
+        if row is None:
+            tasks = self.tasks
+            return [task_row(tasks[position]) for position in positions]
+        return [row(position) for position in positions]
+
+    def encode(self, positions: Iterable[int]) -> List[str]:
+        return [task_json(row) for row in self.rows(positions)]
+
+    def _base(self) -> Sequence[Task]:
+        tasks = self.tasks
+        return tasks.base if isinstance(tasks, TaskOverlay) else tasks
+
+    def _index_ids(self, ids: Dict[str, int]) -> None:
+        # Layers the writes made so far over the ids of the base sequence.
+        tasks = self.tasks
+        if isinstance(tasks, TaskOverlay):
+            base = tasks.base
+            for position, task in sorted(tasks.changed.items()):
+                if position < len(base):
+                    replaced = base[position].id
+                    if replaced != task.id and ids.get(replaced) == position:
+                        del ids[replaced]
+                ids[task.id] = position
+        for position in iter_bitmap(bitmap_bytes(self.deleted)):
+            if ids.get(tasks[position].id) == position:
+                del ids[tasks[position].id]
+        self._ids = ids
+
+    async def load_ids(self) -> None:
+        # Deriving the id of every generated task takes seconds, so writers
+        # do it in a thread before their first lookup. The base sequence is
+        # read-only; writes landing meanwhile are layered on afterwards.
+        if self._ids is None:
+            base = self._base()
+            ids = await self._load("ids", lambda: base_ids(base))
+            if self._ids is None:
+                self._index_ids(ids)
+
+    def position(self, task_id: str) -> Optional[int]:
+        if self._ids is None:
+            self._index_ids(base_ids(self._base()))
+        return self._ids.get(task_id)
+
+    def is_deleted(self, position: int) -> bool:
+        return bool(self.deleted >> position & 1)
+
+    def _overlay(self) -> TaskOverlay:
+        if not isinstance(self.tasks, TaskOverlay):
+            self.tasks = TaskOverlay(self.tasks)
+        return self.tasks
+
+    def _reindex(
+        self, position: int, previous: Optional[Task], task: Optional[Task]
+    ) -> None:
+        before = set(task_keys(previous)) if previous is not None else set()
+        after = set(task_keys(task)) if task is not None else set()
+        for field, value in before - after:
+            postings = self.indexes[field].get(value, ())
+            self.indexes[field][value] = without_position(postings, position)
+            bits = self._bitmaps.get((field, value))
+            if bits is not None:
+                self._bitmaps[(field, value)] = bits & ~(1 << position)
+        for field, value in after - before:
+            postings = self.indexes[field].get(value, ())
+            self.indexes[field][value] = with_position(postings, position)
+            bits = self._bitmaps.get((field, value))
+            if bits is not None:
+                self._bitmaps[(field, value)] = bits | (1 << position)
+
+        # Indexes not built yet are caught up when they are.
+        if self._search is not None:
+            self._search.update(position, previous, task)
+        if self._timeline is not None:
+            self._timeline.update(previous, task)
+        self._selections.clear()
+        # The digest changes with every write, so responses cached under
+        # the old one are never served again.
+        change = task.model_dump_json() if task is not None else "deleted"
+        self.digest = blake2b(
+            f"{self.digest}:{position}:{change}".encode(), digest_size=16
+        ).hexdigest()
+
+    def update(self, position: int, task: Task) -> Task:
+        # Replaces the task at position, keeping every index current, and
+        # returns the previous one.
+        tasks = self._overlay()
+        previous = tasks[position]
+        self._reindex(position, previous, task)
+        tasks.changed[position] = task
+        if self._ids is not None and previous.id != task.id:
+            self._ids.pop(previous.id, None)
+            self._ids[task.id] = position
+        return previous
+
+    def insert(self, task: Task) -> int:
+        # Appends a task, returning its position.
+        tasks = self._overlay()
+        position = tasks.size
+        tasks.size += 1
+        tasks.changed[position] = task
+        self._reindex(position, None, task)
+        if self._ids is not None:
+            self._ids[task.id] = position
+        return position
+
+    def delete(self, position: int) -> Task:
+        # Leaves a tombstone; the task drops out of every index and
+        # selection but keeps its position.
+        tasks = self._overlay()
+        previous = tasks[position]
+        self._reindex(position, previous, None)
+        self.deleted |= 1 << position
+        if self._ids is not None:
+            self._ids.pop(previous.id, None)
+        return previous
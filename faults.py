@@ -0,0 +1,166 @@
+import asyncio
+import json
+import math
+import os
+import random
+from pathlib import Path as FilePath
+from typing import Dict, Optional
+
+import yaml
+from fastapi import APIRouter, HTTPException, Path
+from starlette.routing import Match
+
+from models import FaultProfile
+
+router = APIRouter()
+
+# Profiles are keyed by route name (get_tasks) or path template
+# (/api/project/{slug}/tasks); "*" applies to every /api route without
+# one of its own.
+WILDCARD = "*"
+WILDCARD_PREFIX = "/api/"
+# Throttled bodies go out in slices this many times a second.
+THROTTLE_TICKS = 20
+
+profiles: Dict[str, FaultProfile] = {}
+rng = random.Random(os.environ.get("MOCK_FAULT_SEED"))
+
+
+def load_profiles(path: str) -> Dict[str, FaultProfile]:
+    raw = FilePath(path).read_text(encoding="utf-8")
+    data = json.loads(raw) if path.endswith(".json") else yaml.safe_load(raw)
+    return {route: FaultProfile.model_validate(profile) for route, profile in data.items()}
+
+
+def delay(profile: FaultProfile) -> float:
+    if profile.latency == "fixed":
+        millis = profile.latencyMs
+    elif profile.latency == "normal":
+        millis = max(0.0, rng.gauss(profile.latencyMs, profile.jitterMs))
+    elif profile.latency == "longtail":
+        # Log-normal around the median: most requests land near it, a few
+        # take many times longer.
+        millis = rng.lognormvariate(math.log(max(profile.latencyMs, 1e-3)), profile.sigma)
+    else:
+        return 0.0
+    if profile.maxLatencyMs is not None:
+        millis = min(millis, profile.maxLatencyMs)
+    return millis / 1000
+
+
+async def send_error(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def throttled(send, bandwidth_kbps: float):
+    rate = bandwidth_kbps * 1000 / 8
+    step = max(1, int(rate / THROTTLE_TICKS))
+
+    async def send_wrapper(message):
+        if message["type"] != "http.response.body":
+            await send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        for offset in range(0, len(body), step):
+            chunk = body[offset : offset + step]
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or offset + step < len(body),
+                }
+            )
+            await asyncio.sleep(len(chunk) / rate)
+        if not body:
+            await send(message)
+
+    return send_wrapper
+
+
+class FaultMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.routes = None
+
+    def profile_for(self, scope) -> Optional[FaultProfile]:
+        if self.routes is None:
+            self.routes = scope["app"].router.routes
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                profile = profiles.get(getattr(route, "name", None)) or profiles.get(
+                    route.path
+                )
+                if profile is not None:
+                    return profile
+                break
+        if scope["path"].startswith(WILDCARD_PREFIX):
+            return profiles.get(WILDCARD)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiles:
+            await self.app(scope, receive, send)
+            return
+        profile = self.profile_for(scope)
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        roll = rng.random()
+        if roll < profile.timeoutRate:
+            await asyncio.sleep(profile.timeoutMs / 1000)
+            await send_error(send, 504, "Injected timeout")
+            return
+        seconds = delay(profile)
+        if seconds:
+            await asyncio.sleep(seconds)
+        if roll < profile.timeoutRate + profile.errorRate:
+            await send_error(send, profile.errorStatus, "Injected error")
+            return
+        if profile.bandwidthKbps is not None:
+            send = throttled(send, profile.bandwidthKbps)
+        await self.app(scope, receive, send)
+
+
+@router.get("/admin/faults", response_model=Dict[str, FaultProfile])
+async def list_faults():
+    return profiles
+
+
+@router.put("/admin/faults/{route:path}", response_model=FaultProfile)
+async def set_fault(
+    profile: FaultProfile,
+    route: str = Path(..., description="Route name, path template or *"),
+):
+    profiles[route] = profile
+    return profile
+
+
+@router.delete("/admin/faults/{route:path}", status_code=204)
+async def delete_fault(
+    route: str = Path(..., description="Route name, path template or *")
+):
+    if profiles.pop(route, None) is None:
+        raise HTTPException(status_code=404, detail="Fault profile not found")
+
+
+@router.delete("/admin/faults", status_code=204)
+async def clear_faults():
+    profiles.clear()
+
+
+if os.environ.get("MOCK_FAULTS"):
+    profiles.update(load_profiles(os.environ["MOCK_FAULTS"]))
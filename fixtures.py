@@ -0,0 +1,566 @@
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from hashlib import blake2b
+from pathlib import Path
+from types import MappingProxyType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from cache import ResponseCache, response_cache
+from engine import TaskEngine
+from models import Project, ProjectSummary, Status, Task
+from startup import phase
+
+STATUSES: List[Dict[str, str]] = [
+    {
+        "id": "1fda60fc-2348-4193-96df-ac1c1fa1f573",
+        "name": "Backlog",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "6a4ae617-1155-42d3-ba0a-a14f9619a965",
+        "name": "Подготовка информации",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "c91f5e8c-02c6-4d37-886f-86aaad40aa76",
+        "name": "Разработка",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "23b47812-eec8-4219-b6df-e445148e6362",
+        "name": "Бизнес-ревью",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "f4d9f946-b0da-4f3a-b79e-57cfe879d414",
+        "name": "Готово к релизному тестированию",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "6b3efd57-5f8f-4cc6-b9ae-0d694e008d2d",
+        "name": "Подготовлены тест-кейсы",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "982ed361-e4a6-4721-be69-69373b4ae1f3",
+        "name": "Проверка по тест-кейсам",
+        "color": "#f7f7f7",
+    },
+    {
+        "id": "2bbb0413-b29a-4a10-83f9-ce5420a8dd0f",
+        "name": "Задача завершена",
+        "color": "#f7f7f7",
+    },
+]
+
+# Validated once; every store, the default one and every scenario, points
+# at these instances instead of holding equal copies.
+CATALOGUE: Dict[Status, Status] = {
+    status: status for status in map(Status.model_validate, STATUSES)
+}
+
+
+def shared_status(status: Status) -> Status:
+    return CATALOGUE.get(status, status)
+
+
+PROJECTS: List[Dict[str, Any]] = [
+    {
+        "slug": "pik",
+        "name": "ПИК",
+        "status": {"id": "new", "name": "Новый", "color": "#f7f7f7"},
+        "statuses": STATUSES,
+        "releases": [
+            {
+                "id": "d44b91df-8061-4047-a51a-dea0c4efbdcf",
+                "name": "1",
+                "comment": "Планируется после разработки запустить в продакшн первый МВП",
+                "released": "2024-09-09",
+            },
+            {
+                "id": "d44b91df-8061-4047-a51a-dea0c4efbdc323f",
+                "name": "2",
+                "comment": "Планируется после разработки запустить в продакшн первый МВП",
+                "released": "2024-09-09",
+            },
+        ],
+        "responsibles": [
+            {
+                "id": "694a251e-caea-43be-936f-aa4efbd49de3",
+                "fullName": "Иванов Иван Иванович",
+                "team": "client",
+            },
+            {
+                "id": "694a251e-caea-43be-936f-233efbd49de3",
+                "fullName": "Андреев Андрей Андреевич",
+                "team": "dev",
+            },
+        ],
+        "sections": [
+            {"id": "b1385765-aec3-40cd-a8e8-1308bf51a65d", "name": "Каталог"},
+            {"id": "12345678-ijkl-mnop-qrst-1234567890gh", "name": "Тестовый раздел"},
+        ],
+    },
+    {
+        "slug": "project-alpha",
+        "name": "Alpha",
+        "status": {"id": "new", "name": "Новый", "color": "#f7f7f7"},
+        "statuses": STATUSES,
+        "releases": [
+            {
+                "id": "a44b91df-1234-4047-a51a-dea0c4efbdcf",
+                "name": "1.0",
+                "comment": "Initial release for Alpha project",
+                "released": "2024-08-15",
+            }
+        ],
+        "responsibles": [
+            {
+                "id": "12345678-abcd-efgh-ijkl-1234567890ab",
+                "fullName": "Alex",
+                "team": "backend",
+            }
+        ],
+        "sections": [
+            {"id": "09876543-zyxw-vuts-rqpo-0987654321cd", "name": "User Management"}
+        ],
+    },
+    {
+        "slug": "project-beta",
+        "name": "Beta",
+        "status": {"id": "in-progress", "name": "В работе", "color": "#ffcc00"},
+        "statuses": STATUSES,
+        "releases": [
+            {
+                "id": "b34c81ef-2345-4047-b61a-deb0d4efbdcf",
+                "name": "2.1",
+                "comment": "Beta project second phase",
+                "released": "2024-10-10",
+            }
+        ],
+        "responsibles": [
+            {
+                "id": "98765432-abcd-efgh-ijkl-0987654321ef",
+                "fullName": "Maria",
+                "team": "frontend",
+            }
+        ],
+        "sections": [
+            {"id": "87654321-hijk-lmno-pqrs-876543210fed", "name": "Analytics"}
+        ],
+    },
+    {
+        "slug": "project-gamma",
+        "name": "Gamma",
+        "status": {"id": "completed", "name": "Завершен", "color": "#00cc66"},
+        "statuses": STATUSES,
+        "releases": [
+            {
+                "id": "c23d72cf-3456-4047-c71a-dec0e4efbdcf",
+                "name": "3.0",
+                "comment": "Final release of Gamma project",
+                "released": "2024-12-01",
+            }
+        ],
+        "responsibles": [
+            {
+                "id": "abcdef12-3456-7890-abcd-ef1234567890",
+                "fullName": "John",
+                "team": "devops",
+            }
+        ],
+        "sections": [
+            {"id": "12345678-ijkl-mnop-qrst-1234567890gh", "name": "Integration"}
+        ],
+    },
+    {
+        "slug": "project-delta",
+        "name": "Delta",
+        "status": {"id": "new", "name": "Новый", "color": "#f7f7f7"},
+        "statuses": STATUSES,
+        "releases": [
+            {
+                "id": "d12e63bf-4567-4047-d81a-def0f4efbdcf",
+                "name": "0.9",
+                "comment": "Pre-release for Delta project",
+                "released": "2024-07-20",
+            }
+        ],
+        "responsibles": [
+            {
+                "id": "11223344-aabb-ccdd-eeff-112233445566",
+                "fullName": "Alice",
+                "team": "qa",
+            }
+        ],
+        "sections": [
+            {"id": "22334455-6677-8899-aabb-223344556677", "name": "Documentation"}
+        ],
+    },
+]
+
+TASKS: List[Dict[str, Any]] = [
+    {
+        "id": "8f7e8563-5681-4441-a776-e76f4d8e1224",
+        "name": "Атрибуты (детальная страница + список в каталоге)",
+        "comment": "Задержка из-за отсутствия оплат, подписанных актов, решение орг. вопросов",
+        "section": "b1385765-aec3-40cd-a8e8-1308bf51a65d",
+        "release": "d44b91df-8061-4047-a51a-dea0c4efbdcf",
+        "status": STATUSES[7],
+        "events": [
+            {
+                "id": "65354087-f3b4-4864-a76c-756fdce3ee1f",
+                "responsible": "694a251e-caea-43be-936f-aa4efbd49de3",
+                "comment": "Не получили ответ от коллег",
+                "risk": "done",
+                "type": "transfer",
+                "startedAt": "2024-09-10",
+                "endedAt": "2024-09-11",
+            }
+        ],
+    },
+    {
+        "id": "7a5d3821-2a68-43a1-ba36-024a09d18fa1",
+        "name": "Оптимизация производительности API",
+        "comment": "Необходимо ускорить ответы от API до 2 секунд",
+        "section": "b1385765-aec3-40cd-a8e8-1308bf51a65d",
+        "release": "a44b91df-1234-4047-a51a-dea0c4efbdcf",
+        "status": STATUSES[6],
+        "events": [
+            {
+                "id": "12345678-abcd-9876-ijkl-abcdef123456",
+                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
+                "comment": "Найдены узкие места в коде, требуется рефакторинг",
+                "risk": "done",
+                "type": "bugfix",
+                "startedAt": "2024-08-20",
+                "endedAt": "2024-08-21",
+            },
+            {
+                "id": "56789012-efgh-3456-mnop-7890abcdef12",
+                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
+                "comment": "Тестирование оптимизаций на стенде среды",
+                "risk": "no risks",
+                "type": "testing",
+                "startedAt": "2024-08-22",
+                "endedAt": "2024-08-23",
+            },
+        ],
+    },
+    {
+        "id": "1b2c3d4e-5f6a-7b8c-d9e0-f1a2b3c4d5e6",
+        "name": "Интеграция с внешними системами",
+        "comment": "Необходимо согласовать форматы данных с партнерами",
+        "section": "12345678-ijkl-mnop-qrst-1234567890gh",
+        "release": "c23d72cf-3456-4047-c71a-dec0e4efbdcf",
+        "status": STATUSES[0],
+        "events": [
+            {
+                "id": "56789012-efgh-3456-mnop-7890abcdef12",
+                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
+                "comment": "Тестирование оптимизаций на стенде среды",
+                "risk": "have blockers",
+                "type": "testing",
+                "startedAt": "2024-08-22",
+                "endedAt": "2024-08-23",
+            }
+        ],
+    },
+]
+
+
+def summarize(project: Project) -> ProjectSummary:
+    release = project.releases[0]
+    return ProjectSummary(
+        slug=project.slug,
+        name=project.name,
+        status={"name": project.status.name, "color": project.status.color},
+        release=release.model_dump(),
+    )
+
+
+def digest(*parts: bytes) -> str:
+    value = blake2b(digest_size=16)
+    for part in parts:
+        value.update(part)
+    return value.hexdigest()
+
+
+def project_digest(project: Project, engine: TaskEngine) -> str:
+    return digest(project.model_dump_json().encode(), engine.digest.encode())
+
+
+class FixtureStore:
+    def __init__(
+        self,
+        projects: Iterable[Project],
+        engines: Mapping[str, TaskEngine],
+        source: Optional[str] = None,
+    ):
+        self.source = source
+        self.source_files: Dict[Path, str] = {}
+        # False while a deferred build is still running; see health.py.
+        self.ready = True
+        # Scenario stores get their own; see scenarios.py.
+        self.cache: ResponseCache = response_cache
+        # Called as listener(slug, previous engine, new engine) after a
+        # project is replaced or (with None) removed.
+        self.listeners: List[
+            Callable[[str, Optional[TaskEngine], Optional[TaskEngine]], None]
+        ] = []
+        self._project_json: Dict[str, bytes] = {}
+        self._summary_json: Dict[str, str] = {}
+        # Listing order per slug, fixed when the slug is first published and
+        # kept after it is removed, so project cursors can always seek past it.
+        self.project_ranks: Dict[str, int] = {}
+        projects = {project.slug: project for project in projects}
+        self._publish(
+            projects,
+            dict(engines),
+            {slug: summarize(project) for slug, project in projects.items()},
+            {
+                slug: project_digest(project, engines[slug])
+                for slug, project in projects.items()
+            },
+        )
+
+    def _publish(
+        self,
+        projects: Dict[str, Project],
+        engines: Dict[str, TaskEngine],
+        summaries: Dict[str, ProjectSummary],
+        digests: Dict[str, str],
+    ) -> None:
+        # Every public attribute is rebuilt and swapped in one go on the
+        # event loop, so a request never sees a half-applied reload.
+        ranks = self.project_ranks
+        for slug in summaries:
+            ranks.setdefault(slug, len(ranks))
+        by_status: Dict[str, List[ProjectSummary]] = {}
+        for summary in sorted(summaries.values(), key=lambda item: ranks[item.slug]):
+            by_status.setdefault(summary.status.name, []).append(summary)
+
+        self.projects: Mapping[str, Project] = MappingProxyType(projects)
+        self.engines: Mapping[str, TaskEngine] = MappingProxyType(engines)
+        self.summaries: Tuple[ProjectSummary, ...] = tuple(summaries.values())
+        self.summaries_by_status: Mapping[str, Tuple[ProjectSummary, ...]] = (
+            MappingProxyType(
+                {name: tuple(summaries) for name, summaries in by_status.items()}
+            )
+        )
+        self.status_ranks: Mapping[str, Tuple[int, ...]] = MappingProxyType(
+            {
+                name: tuple(ranks[summary.slug] for summary in summaries)
+                for name, summaries in by_status.items()
+            }
+        )
+        # Updated in place by written(); everything else is swapped whole.
+        self._digests = digests
+        self.project_digests: Mapping[str, str] = MappingProxyType(digests)
+        self.digest = digest("".join(digests.values()).encode())
+        self._stamp()
+
+    def _stamp(self) -> None:
+        loaded_at = datetime.now(timezone.utc).replace(microsecond=0)
+        # Last-Modified only has whole seconds. Once the store changes twice
+        # within one, a client holding that second's date may have either
+        # version, so If-Modified-Since is not answered with 304 until the
+        # next change lands in a later second; ETags are unaffected.
+        self.last_modified_exact = getattr(self, "loaded_at", None) != loaded_at
+        self.loaded_at = loaded_at
+        self.last_modified = format_datetime(loaded_at, usegmt=True)
+
+    def adopt(self, other: "FixtureStore") -> None:
+        # Takes over another store's projects in place, so every module
+        # holding a reference to this store sees them.
+        previous = dict(self.engines)
+        self.source = other.source
+        self.source_files = other.source_files
+        self._project_json.clear()
+        self._summary_json.clear()
+        self._publish(
+            dict(other.projects),
+            dict(other.engines),
+            {summary.slug: summary for summary in other.summaries},
+            dict(other.project_digests),
+        )
+        for slug in {**previous, **self.engines}:
+            self._notify(slug, previous.get(slug), self.engines.get(slug))
+
+    def written(self, slug: str) -> None:
+        # A write changed the project's engine in place. Summaries, listing
+        # order and every other project are untouched, so only the digests
+        # move; a full publish per write would cap large stores at a few
+        # hundred writes a second.
+        engine = self.engines[slug]
+        digests = self._digests
+        digests[slug] = digest(self.project_json(slug), engine.digest.encode())
+        self.digest = digest("".join(digests.values()).encode())
+        self._stamp()
+        self._notify(slug, engine, engine)
+
+    def replace(self, project: Project, engine: TaskEngine) -> None:
+        slug = project.slug
+        projects = dict(self.projects)
+        engines = dict(self.engines)
+        summaries = {summary.slug: summary for summary in self.summaries}
+        digests = dict(self.project_digests)
+        projects[slug] = project
+        engines[slug] = engine
+        summaries[slug] = summarize(project)
+        digests[slug] = project_digest(project, engine)
+        self._project_json.pop(slug, None)
+        self._summary_json.pop(slug, None)
+        previous = self.engines.get(slug)
+        self._publish(projects, engines, summaries, digests)
+        self._notify(slug, previous, engine)
+
+    def remove(self, slug: str) -> None:
+        if slug not in self.projects:
+            return
+        projects = dict(self.projects)
+        engines = dict(self.engines)
+        summaries = {summary.slug: summary for summary in self.summaries}
+        digests = dict(self.project_digests)
+        for mapping in (projects, engines, summaries, digests):
+            del mapping[slug]
+        self._project_json.pop(slug, None)
+        self._summary_json.pop(slug, None)
+        previous = self.engines[slug]
+        self._publish(projects, engines, summaries, digests)
+        self._notify(slug, previous, None)
+
+    def _notify(
+        self, slug: str, previous: Optional[TaskEngine], engine: Optional[TaskEngine]
+    ) -> None:
+        for listener in self.listeners:
+            listener(slug, previous, engine)
+
+    async def loaded(
+        self,
+        slug: str,
+        load: Optional[Callable[[TaskEngine], Awaitable[Any]]] = None,
+    ) -> Optional[TaskEngine]:
+        # The project's engine once load() has built what it needs, or None
+        # if the project is gone. A reload may swap the engine while a build
+        # is awaited, so this retries on the new one; callers read digests
+        # and the project after it returns, with no await in between, so
+        # they describe the engine a response is built from.
+        while True:
+            engine = self.engines.get(slug)
+            if engine is None or load is None:
+                return engine
+            await load(engine)
+            if self.engines.get(slug) is engine:
+                return engine
+
+    def nbytes(self) -> int:
+        return sum(engine.nbytes() for engine in self.engines.values())
+
+    def project_json(self, slug: str) -> Optional[bytes]:
+        encoded = self._project_json.get(slug)
+        if encoded is None:
+            project = self.projects.get(slug)
+            if project is None:
+                return None
+            encoded = self._project_json[slug] = project.model_dump_json().encode()
+        return encoded
+
+    def summary_json(self, summary: ProjectSummary) -> str:
+        encoded = self._summary_json.get(summary.slug)
+        if encoded is None:
+            encoded = self._summary_json[summary.slug] = summary.model_dump_json()
+        return encoded
+
+    @classmethod
+    def from_data(
+        cls, projects: Iterable[Dict[str, Any]], tasks: Iterable[Dict[str, Any]]
+    ) -> "FixtureStore":
+        projects = [
+            project.model_copy(
+                update={"statuses": list(map(shared_status, project.statuses))}
+            )
+            for project in map(Project.model_validate, projects)
+        ]
+        # The hand-written tasks are shared by every project, but each gets
+        # its own engine: writes to one project must not show up in another.
+        tasks = tuple(
+            task.model_copy(update={"status": shared_status(task.status)})
+            for task in map(Task.model_validate, tasks)
+        )
+        return cls(projects, {project.slug: TaskEngine(tasks) for project in projects})
+
+    @classmethod
+    def generate(
+        cls,
+        projects: int,
+        tasks: int,
+        seed: int,
+        statuses: Optional[Iterable[Status]] = None,
+    ) -> "FixtureStore":
+        from generator import generate
+
+        statuses = CATALOGUE if statuses is None else map(shared_status, statuses)
+        return cls(*generate(projects, tasks, seed, list(statuses)))
+
+    @classmethod
+    def from_file(cls, path: str) -> "FixtureStore":
+        from columnar import load
+
+        return cls(*load(path))
+
+    @classmethod
+    def from_directory(cls, path: str) -> "FixtureStore":
+        from watcher import load_directory
+
+        files: Dict[Path, str] = {}
+        store = cls(*load_directory(path, files), source=path)
+        store.source_files = files
+        return store
+
+
+def load_store(
+    directory: Optional[str] = None,
+    path: Optional[str] = None,
+    projects: int = 0,
+    tasks: int = 1000,
+    seed: int = 0,
+    statuses: Optional[Iterable[Status]] = None,
+) -> FixtureStore:
+    if directory:
+        return FixtureStore.from_directory(directory)
+    if path:
+        return FixtureStore.from_file(path)
+    if projects > 0:
+        return FixtureStore.generate(projects, tasks, seed, statuses)
+    return FixtureStore.from_data(PROJECTS, TASKS)
+
+
+def load_default_store() -> FixtureStore:
+    with phase("fixtures"):
+        return load_store(
+            os.environ.get("MOCK_FIXTURES_DIR"),
+            os.environ.get("MOCK_FIXTURE_FILE"),
+            int(os.environ.get("MOCK_PROJECTS", "0")),
+            int(os.environ.get("MOCK_TASKS", "1000")),
+            int(os.environ.get("MOCK_SEED", "0")),
+        )
+
+
+if os.environ.get("MOCK_DEFER_FIXTURES", "") not in ("", "0"):
+    # Starts empty; health.py builds the fixtures after the server is up.
+    store = FixtureStore([], {})
+    store.ready = False
+else:
+    store = load_default_store()
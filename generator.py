@@ -0,0 +1,329 @@
+import random
+from array import array
+from datetime import date, timedelta
+from hashlib import blake2b
+from operator import add
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple, Union
+
+from engine import FIELDS, TaskEngine
+from models import Event, Project, Status, Task
+from records import TaskRow
+from startup import phase
+from timeline import EventColumns
+
+GENERATOR_VERSION = 1
+BATCH = 65536
+
+PROJECT_STATUSES = [
+    {"id": "new", "name": "Новый", "color": "#f7f7f7"},
+    {"id": "in-progress", "name": "В работе", "color": "#ffcc00"},
+    {"id": "completed", "name": "Завершен", "color": "#00cc66"},
+]
+TEAMS = ["client", "dev", "backend", "frontend", "devops", "qa", "design", "analytics"]
+FIRST_NAMES = ["Иван", "Андрей", "Мария", "Ольга", "Alex", "John", "Alice", "Maria"]
+LAST_NAMES = ["Иванов", "Андреев", "Смирнова", "Петрова", "Smith", "Brown", "Lee"]
+SECTIONS = [
+    "Каталог", "Корзина", "Личный кабинет", "Оплата", "Поиск", "Analytics",
+    "Integration", "Documentation", "User Management", "Notifications",
+    "Reports", "Admin", "Тестовый раздел", "Доставка", "Checkout", "Mobile",
+]
+ACTIONS = [
+    "Доработать", "Оптимизировать", "Интегрировать", "Протестировать",
+    "Refactor", "Implement", "Fix", "Review", "Migrate", "Document",
+]
+SUBJECTS = [
+    "атрибуты товара", "производительность API", "внешние системы",
+    "детальную страницу", "список в каталоге", "форму оплаты",
+    "search results", "user settings", "export to CSV", "push notifications",
+    "caching layer", "audit log", "role model", "order history",
+]
+COMMENTS = [
+    "Задержка из-за отсутствия оплат, подписанных актов, решение орг. вопросов",
+    "Необходимо ускорить ответы от API до 2 секунд",
+    "Необходимо согласовать форматы данных с партнерами",
+    "Не получили ответ от коллег",
+    "Найдены узкие места в коде, требуется рефакторинг",
+    "Тестирование оптимизаций на стенде среды",
+    "Waiting for design approval",
+    "Blocked by the payments team",
+    "Ready for business review",
+    "Requirements are still being clarified",
+]
+RISKS = ["done", "no risks", "have blockers", "at risk"]
+EVENT_TYPES = ["transfer", "bugfix", "testing", "development", "review"]
+NAMES = [f"{action} {subject}" for action in ACTIONS for subject in SUBJECTS]
+EPOCH = date(2024, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def make_uuid(*parts: Any) -> str:
+    # Same value as str(uuid.UUID(bytes=digest, version=4)), formatted
+    # directly because this runs once per generated task and event.
+    raw = blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    variant = "89ab"[int(raw[16], 16) & 3]
+    return f"{raw[:8]}-{raw[8:12]}-4{raw[13:16]}-{variant}{raw[17:20]}-{raw[20:]}"
+
+
+def column(rng: random.Random, size: int, choices: int) -> bytes:
+    # Maps random bytes onto [0, choices) in C; the slight modulo bias is
+    # irrelevant for synthetic data and keeps generation vectorised.
+    table = bytes(value % choices for value in range(256))
+    return rng.randbytes(size).translate(table)
+
+
+def wide_column(rng: random.Random, size: int, choices: int) -> array:
+    if choices <= 256:
+        return array("H", memoryview(column(rng, size, choices)))
+    values = array("H", rng.randbytes(size * 2))
+    return array("H", (value % choices for value in values))
+
+
+class GeneratedTasks(Sequence[Task]):
+    def __init__(self, key: Tuple[int, int], project: Project, size: int, seed: int):
+        self.key = key
+        self.size = size
+        self.statuses = project.statuses
+        self.sections = [section.id for section in project.sections]
+        self.releases = [release.id for release in project.releases]
+        self.responsibles = [responsible.id for responsible in project.responsibles]
+        rng = random.Random(seed)
+
+        self.status = array("B")
+        self.section = array("H")
+        self.release = array("H")
+        self.name = array("H")
+        self.comment = array("B")
+        self.event_offsets = array("I", [0])
+        self.event_responsible = array("H")
+        self.event_comment = array("B")
+        self.event_risk = array("B")
+        self.event_type = array("B")
+        self.event_start = array("H")
+        self.event_length = array("B")
+
+        for start in range(0, size, BATCH):
+            batch = min(BATCH, size - start)
+            self.status.frombytes(column(rng, batch, len(self.statuses)))
+            self.section.extend(wide_column(rng, batch, len(self.sections)))
+            self.release.extend(wide_column(rng, batch, len(self.releases)))
+            self.name.extend(wide_column(rng, batch, len(NAMES)))
+            self.comment.frombytes(column(rng, batch, len(COMMENTS)))
+
+            counts = column(rng, batch, 3)
+            offset = self.event_offsets[-1]
+            for count in counts:
+                offset += count + 1
+                self.event_offsets.append(offset)
+            events = offset - len(self.event_responsible)
+            self.event_responsible.extend(
+                wide_column(rng, events, len(self.responsibles))
+            )
+            self.event_comment.frombytes(column(rng, events, len(COMMENTS)))
+            self.event_risk.frombytes(column(rng, events, len(RISKS)))
+            self.event_type.frombytes(column(rng, events, len(EVENT_TYPES)))
+            self.event_start.extend(wide_column(rng, events, 730))
+            self.event_length.frombytes(column(rng, events, 14))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.size))]
+        if position < 0:
+            position += self.size
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        return Task.model_construct(
+            id=make_uuid(self.key, position),
+            name=NAMES[self.name[position]],
+            comment=COMMENTS[self.comment[position]],
+            section=self.sections[self.section[position]],
+            release=self.releases[self.release[position]],
+            status=self.statuses[self.status[position]],
+            events=[
+                self.event(position, index)
+                for index in range(
+                    self.event_offsets[position], self.event_offsets[position + 1]
+                )
+            ],
+        )
+
+    def event(self, position: int, index: int) -> Event:
+        started = EPOCH + timedelta(days=self.event_start[index])
+        return Event.model_construct(
+            id=make_uuid(self.key, position, index),
+            responsible=self.responsibles[self.event_responsible[index]],
+            comment=COMMENTS[self.event_comment[index]],
+            risk=RISKS[self.event_risk[index]],
+            type=EVENT_TYPES[self.event_type[index]],
+            startedAt=started,
+            endedAt=started + timedelta(days=self.event_length[index]),
+        )
+
+    def row(self, position: int) -> TaskRow:
+        # The records.TaskRow shape, skipping pydantic.
+        events = []
+        offsets = self.event_offsets
+        for index in range(offsets[position], offsets[position + 1]):
+            started = EPOCH_ORDINAL + self.event_start[index]
+            events.append(
+                (
+                    make_uuid(self.key, position, index),
+                    self.responsibles[self.event_responsible[index]],
+                    COMMENTS[self.event_comment[index]],
+                    RISKS[self.event_risk[index]],
+                    EVENT_TYPES[self.event_type[index]],
+                    started,
+                    started + self.event_length[index],
+                )
+            )
+        return (
+            make_uuid(self.key, position),
+            NAMES[self.name[position]],
+            COMMENTS[self.comment[position]],
+            self.sections[self.section[position]],
+            self.releases[self.release[position]],
+            self.statuses[self.status[position]],
+            events,
+        )
+
+    def rows(self) -> Iterator[TaskRow]:
+        return map(self.row, range(self.size))
+
+    def nbytes(self) -> int:
+        return sum(
+            len(column) * getattr(column, "itemsize", 1)
+            for column in vars(self).values()
+            if isinstance(column, (array, bytes))
+        )
+
+    def ids(self) -> Iterator[str]:
+        key = self.key
+        return (make_uuid(key, position) for position in range(self.size))
+
+    def text_postings(self) -> Dict[str, array]:
+        # search.text_postings, grouped by code instead of per Task.
+        postings: Dict[str, array] = {}
+        for codes, labels in ((self.name, NAMES), (self.comment, COMMENTS)):
+            grouped = [array("I") for _ in labels]
+            for position, code in enumerate(codes):
+                grouped[code].append(position)
+            for label, positions in zip(labels, grouped):
+                if positions:
+                    postings.setdefault(label, array("I")).extend(positions)
+
+        grouped = [array("I") for _ in COMMENTS]
+        offsets = self.event_offsets
+        comment = self.event_comment
+        for position in range(self.size):
+            for code in set(comment[offsets[position] : offsets[position + 1]]):
+                grouped[code].append(position)
+        for label, positions in zip(COMMENTS, grouped):
+            if positions:
+                postings.setdefault(label, array("I")).extend(positions)
+        return postings
+
+    def event_columns(self) -> EventColumns:
+        # timeline.event_columns, read off the event columns directly.
+        starts = array("i", [EPOCH_ORDINAL + start for start in self.event_start])
+        ends = array("i", map(add, starts, self.event_length))
+        return starts, ends, {
+            "risk": (self.event_risk, RISKS),
+            "type": (self.event_type, EVENT_TYPES),
+            "responsible": (self.event_responsible, self.responsibles),
+        }
+
+    def indexes(self) -> Dict[str, Dict[str, array]]:
+        indexes: Dict[str, Dict[str, array]] = {field: {} for field in FIELDS}
+        for field, codes, labels in (
+            ("section", self.section, self.sections),
+            ("release", self.release, self.releases),
+            ("status", self.status, [status.id for status in self.statuses]),
+        ):
+            postings = [array("I") for _ in labels]
+            for position, code in enumerate(codes):
+                postings[code].append(position)
+            indexes[field] = {
+                label: values for label, values in zip(labels, postings) if values
+            }
+
+        postings = [array("I") for _ in self.responsibles]
+        offsets = self.event_offsets
+        responsible = self.event_responsible
+        for position in range(self.size):
+            seen = set(responsible[offsets[position] : offsets[position + 1]])
+            for code in seen:
+                postings[code].append(position)
+        indexes["responsible"] = {
+            label: values
+            for label, values in zip(self.responsibles, postings)
+            if values
+        }
+        return indexes
+
+
+def generate_project(rng: random.Random, index: int, statuses: List[Status]):
+    seed = rng.getrandbits(64)
+    local = random.Random(seed)
+    releases = []
+    released = EPOCH + timedelta(days=local.randrange(60))
+    for number in range(local.randint(2, 8)):
+        released += timedelta(days=local.randint(14, 90))
+        releases.append(
+            {
+                "id": make_uuid(seed, "release", number),
+                "name": f"{number // 3 + 1}.{number % 3}",
+                "comment": local.choice(COMMENTS),
+                "released": released.isoformat(),
+            }
+        )
+    return seed, Project.model_validate(
+        {
+            "slug": f"project-{index:05d}",
+            "name": f"Project {index}",
+            "status": local.choice(PROJECT_STATUSES),
+            "statuses": statuses,
+            "releases": releases,
+            "responsibles": [
+                {
+                    "id": make_uuid(seed, "responsible", number),
+                    "fullName": f"{local.choice(LAST_NAMES)} {local.choice(FIRST_NAMES)}",
+                    "team": local.choice(TEAMS),
+                }
+                for number in range(local.randint(3, 30))
+            ],
+            "sections": [
+                {"id": make_uuid(seed, "section", number), "name": name}
+                for number, name in enumerate(
+                    local.sample(SECTIONS, local.randint(2, len(SECTIONS)))
+                )
+            ],
+        }
+    )
+
+
+def generate(
+    projects: int, tasks: int, seed: int, statuses: Sequence[Union[Status, dict]]
+) -> Tuple[List[Project], Mapping[str, TaskEngine]]:
+    rng = random.Random(seed)
+    # Every project shares one validated status catalogue; Status
+    # instances are kept as they are, so it can be shared across stores.
+    catalogue = [Status.model_validate(status) for status in statuses]
+    result = []
+    engines = {}
+    for index in range(projects):
+        project_seed, project = generate_project(rng, index, catalogue)
+        with phase("generator columns"):
+            generated = GeneratedTasks((seed, index), project, tasks, project_seed)
+        if index == 0 and tasks:
+            Task.model_validate(generated[0].model_dump())
+        version = blake2b(
+            repr((GENERATOR_VERSION, seed, index, tasks)).encode(), digest_size=16
+        ).hexdigest()
+        result.append(project)
+        with phase("engine indexes"):
+            indexes = generated.indexes()
+        engines[project.slug] = TaskEngine(generated, indexes=indexes, digest=version)
+    return result, engines
+
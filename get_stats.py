@@ -0,0 +1,58 @@
+import json
+from typing import Dict, Iterable
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+
+from cache import cached_response
+from engine import TaskEngine
+from fixtures import FixtureStore
+from models import ProjectStats
+from scenarios import current_store
+
+router = APIRouter()
+
+
+def with_catalogue(counts: Dict[str, int], catalogue: Iterable[str]) -> Dict[str, int]:
+    # Every value the project defines, in its order and zero if unused,
+    # then any the tasks use without the project defining them.
+    result = {value: counts.get(value, 0) for value in catalogue}
+    result.update(counts)
+    return result
+
+
+@router.get("/api/project/{slug}/stats", response_model=ProjectStats)
+async def get_stats(
+    request: Request,
+    slug: str = Path(..., description="The slug of the project"),
+    store: FixtureStore = Depends(current_store),
+):
+    engine = await store.loaded(slug, TaskEngine.load_timeline)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    version = store.project_digests[slug]
+    project = store.projects[slug]
+    timeline = engine.timeline
+
+    def build():
+        # Only reads counters the engine keeps current, so the cost is in
+        # the number of buckets, never the number of tasks.
+        risks = timeline.groups["risk"]
+        stats = {
+            "tasks": len(engine),
+            "events": timeline.total.count,
+            "status": with_catalogue(
+                engine.counts("status"), (status.id for status in project.statuses)
+            ),
+            "release": with_catalogue(
+                engine.counts("release"),
+                (release.id for release in project.releases),
+            ),
+            "section": with_catalogue(
+                engine.counts("section"),
+                (section.id for section in project.sections),
+            ),
+            "risk": {risk: risks[risk].count for risk in sorted(risks)},
+        }
+        return json.dumps(stats, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return cached_response(request, store, version, ("stats", slug), build)
@@ -1,137 +1,139 @@
-from fastapi import APIRouter, Query, Path
-from typing import Optional, List
-from pydantic import BaseModel
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
+from fastapi.responses import StreamingResponse
+from itertools import islice
+from typing import Iterator, Optional, List, Tuple
+
+from cache import cached_response, filter_key
+from cursors import decode_position_cursor, encode_cursor
+from fixtures import FixtureStore
+from engine import Selection, TaskEngine
+from models import TasksResponse
+from records import page_json
+from scenarios import current_store
+from search import query_terms
 
 router = APIRouter()
 
-class Status(BaseModel):
-    id: str
-    name: str
-    color: str
-
-class Event(BaseModel):
-    id: str
-    responsible: str
-    comment: str
-    risk: str
-    type: str
-    startedAt: date
-    endedAt: date
-
-class Task(BaseModel):
-    id: str
-    name: str
-    comment: str
-    section: str
-    release: str
-    status: Status
-    events: List[Event]
-
-class TasksResponse(BaseModel):
-    page: int
-    perPage: int
-    count: int
-    tasks: List[Task]
+EXPORT_BATCH = 256
+
+
+def holds(engine: TaskEngine, after: Tuple[int, str]) -> bool:
+    position, task_id = after
+    return position < 0 or (
+        position < len(engine.tasks) and engine.rows([position])[0][0] == task_id
+    )
+
+
+def cursor_position(engine: TaskEngine, after: Tuple[int, str]) -> int:
+    # Positions move when a project is reloaded or restored from the journal,
+    # so a cursor whose position no longer holds its task is resolved by id.
+    if holds(engine, after):
+        return after[0]
+    position = engine.position(after[1])
+    if position is None:
+        raise HTTPException(status_code=400, detail="Cursor task no longer exists")
+    return position
+
 
 @router.get("/api/project/{slug}/tasks", response_model=TasksResponse)
 async def get_tasks(
+    request: Request,
     slug: str = Path(..., description="The slug of the project"),
     page: int = Query(1, ge=1, description="Page number"),
     perPage: int = Query(10, ge=1, description="Number of items per page"),
     responsible: Optional[List[str]] = Query(None, description="List of responsible IDs"),
     release: Optional[List[str]] = Query(None, description="List of release IDs"),
-    section: Optional[List[str]] = Query(None, description="List of section IDs")
+    section: Optional[List[str]] = Query(None, description="List of section IDs"),
+    status: Optional[List[str]] = Query(None, description="List of status IDs"),
+    q: Optional[str] = Query(
+        None, description="Search names and comments; every word matches as a prefix"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from nextCursor, empty to start keyset paging"
+    ),
+    store: FixtureStore = Depends(current_store),
 ):
-    
-    example_task1 = {
-        "id": "8f7e8563-5681-4441-a776-e76f4d8e1224",
-        "name": "Атрибуты (детальная страница + список в каталоге)",
-        "comment": "Задержка из-за отсутствия оплат, подписанных актов, решение орг. вопросов",
-        "section": "b1385765-aec3-40cd-a8e8-1308bf51a65d",
-        "release": "d44b91df-8061-4047-a51a-dea0c4efbdcf",
-        "status": {
-            "id": "2bbb0413-b29a-4a10-83f9-ce5420a8dd0f",
-            "name": "Задача завершена",
-            "color": "#f7f7f7"
-        },
-        "events": [
-            {
-                "id": "65354087-f3b4-4864-a76c-756fdce3ee1f",
-                "responsible": "694a251e-caea-43be-936f-aa4efbd49de3",
-                "comment": "Не получили ответ от коллег",
-                "risk": "done",
-                "type": "transfer",
-                "startedAt": "2024-09-10",
-                "endedAt": "2024-09-11"
-            }
-        ]
-    }
-    
-    example_task2 = {
-        "id": "7a5d3821-2a68-43a1-ba36-024a09d18fa1",
-        "name": "Оптимизация производительности API",
-        "comment": "Необходимо ускорить ответы от API до 2 секунд",
-        "section": "b1385765-aec3-40cd-a8e8-1308bf51a65d",
-        "release": "a44b91df-1234-4047-a51a-dea0c4efbdcf",
-        "status": {
-            "id": "982ed361-e4a6-4721-be69-69373b4ae1f3",
-            "name": "Проверка по тест-кейсам",
-            "color": "#f7f7f7"
-        },
-        "events": [
-            {
-                "id": "12345678-abcd-9876-ijkl-abcdef123456",
-                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
-                "comment": "Найдены узкие места в коде, требуется рефакторинг",
-                "risk": "done",
-                "type": "bugfix",
-                "startedAt": "2024-08-20",
-                "endedAt": "2024-08-21"
-            },
-            {
-                "id": "56789012-efgh-3456-mnop-7890abcdef12",
-                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
-                "comment": "Тестирование оптимизаций на стенде среды",
-                "risk": "no risks",
-                "type": "testing",
-                "startedAt": "2024-08-22",
-                "endedAt": "2024-08-23"
-            }
-        ]
-    }
-    
-    example_task3 = {
-        "id": "1b2c3d4e-5f6a-7b8c-d9e0-f1a2b3c4d5e6",
-        "name": "Интеграция с внешними системами",
-        "comment": "Необходимо согласовать форматы данных с партнерами",
-        "section": "12345678-ijkl-mnop-qrst-1234567890gh",
-        "release": "c23d72cf-3456-4047-c71a-dec0e4efbdcf",
-        "status": {
-            "id": "1fda60fc-2348-4193-96df-ac1c1fa1f573",
-            "name": "Backlog",
-            "color": "#f7f7f7"
-        },
-        "events": [
-            {
-                "id": "56789012-efgh-3456-mnop-7890abcdef12",
-                "responsible": "694a251e-caea-43be-936f-233efbd49de3",
-                "comment": "Тестирование оптимизаций на стенде среды",
-                "risk": "have blockers",
-                "type": "testing",
-                "startedAt": "2024-08-22",
-                "endedAt": "2024-08-23"
-            }
-        ]
+    terms = query_terms(q)
+    seek_from = decode_position_cursor("task", cursor)
+
+    async def load(engine: TaskEngine) -> None:
+        if terms:
+            await engine.load_search()
+        if seek_from is not None and not holds(engine, seek_from):
+            await engine.load_ids()
+
+    engine = await store.loaded(slug, load)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    version = store.project_digests[slug]
+    after = None if seek_from is None else cursor_position(engine, seek_from)
+
+    filters = {
+        "responsible": filter_key(responsible),
+        "release": filter_key(release),
+        "section": filter_key(section),
+        "status": filter_key(status),
     }
 
-    return TasksResponse(
-        page=page,
-        perPage=perPage,
-        count=120,
-        tasks=[
-            example_task1,
-            example_task2,
-            example_task3
-        ]
+    def build():
+        if after is None:
+            count, positions = engine.page(
+                filters, (page - 1) * perPage, perPage + 1, terms
+            )
+        else:
+            count, positions = engine.seek(filters, after, perPage + 1, terms)
+        next_cursor = None
+        if len(positions) > perPage:
+            del positions[perPage:]
+            last = positions[-1]
+            next_cursor = encode_cursor("task", f"{last}:{engine.rows([last])[0][0]}")
+        return page_json(
+            page, perPage, count, "tasks", engine.encode(positions), next_cursor
+        )
+
+    key = ("tasks", slug, page, perPage, after) + tuple(filters.values())
+    if terms:
+        key += (("q", terms),)
+    return cached_response(request, store, version, key, build)
+
+
+def iter_ndjson(engine: TaskEngine, selection: Selection) -> Iterator[bytes]:
+    positions = iter(selection)
+    while True:
+        lines = engine.encode(islice(positions, EXPORT_BATCH))
+        if not lines:
+            return
+        lines.append("")
+        yield "\n".join(lines).encode()
+
+
+@router.get("/api/project/{slug}/tasks/export")
+async def export_tasks(
+    slug: str = Path(..., description="The slug of the project"),
+    responsible: Optional[List[str]] = Query(None, description="List of responsible IDs"),
+    release: Optional[List[str]] = Query(None, description="List of release IDs"),
+    section: Optional[List[str]] = Query(None, description="List of section IDs"),
+    status: Optional[List[str]] = Query(None, description="List of status IDs"),
+    q: Optional[str] = Query(
+        None, description="Search names and comments; every word matches as a prefix"
+    ),
+    store: FixtureStore = Depends(current_store),
+):
+    terms = query_terms(q)
+    engine = await store.loaded(slug, TaskEngine.load_search if terms else None)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    selection = engine.select(
+        {
+            "responsible": filter_key(responsible),
+            "release": filter_key(release),
+            "section": filter_key(section),
+            "status": filter_key(status),
+        },
+        terms,
+    )
+    return StreamingResponse(
+        iter_ndjson(engine, selection),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Count": str(selection.count)},
     )
@@ -0,0 +1,100 @@
+import json
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+
+from cache import cached_response
+from engine import TaskEngine
+from fixtures import FixtureStore
+from models import TimelineResponse
+from scenarios import current_store
+
+router = APIRouter()
+
+# Keeps a single response to a few milliseconds of bisecting: ten years
+# of weeks, or a bit over five years of days.
+MAX_BUCKETS = 2000
+STEPS = {"day": 1, "week": 7}
+
+
+@router.get("/api/project/{slug}/timeline", response_model=TimelineResponse)
+async def get_timeline(
+    request: Request,
+    slug: str = Path(..., description="The slug of the project"),
+    start: Optional[date] = Query(
+        None, description="First day of the window, defaults to the earliest event"
+    ),
+    end: Optional[date] = Query(
+        None, description="Last day of the window, defaults to the latest event"
+    ),
+    interval: Literal["day", "week"] = Query(
+        "day", description="Bucket size; weeks are counted from start"
+    ),
+    groupBy: Literal["risk", "type", "responsible"] = Query(
+        "risk", description="Event field to break counts down by"
+    ),
+    store: FixtureStore = Depends(current_store),
+):
+    engine = await store.loaded(slug, TaskEngine.load_timeline)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    version = store.project_digests[slug]
+    timeline = engine.timeline
+    first, last = timeline.span() or (date.today().toordinal(),) * 2
+    if start is not None:
+        first = start.toordinal()
+    if end is not None:
+        last = end.toordinal()
+    if last < first:
+        raise HTTPException(status_code=400, detail="end is before start")
+    step = STEPS[interval]
+    if (last - first) // step + 1 > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail=f"More than {MAX_BUCKETS} buckets requested"
+        )
+
+    def build():
+        # Counts are of events overlapping each bucket, so an event spanning
+        # several buckets is counted in each of them.
+        firsts = list(range(first, last + 1, step))
+        lasts = [min(day + step - 1, last) for day in firsts]
+        groups = sorted(timeline.groups[groupBy].items())
+        totals = {
+            label: intervals.overlapping(first, last) for label, intervals in groups
+        }
+        series = [
+            (label, intervals.buckets(firsts, lasts)) for label, intervals in groups
+        ]
+        buckets = [
+            {
+                "start": date.fromordinal(bucket_first).isoformat(),
+                "end": date.fromordinal(bucket_last).isoformat(),
+                "count": count,
+                "groups": {label: counts[index] for label, counts in series},
+            }
+            for index, (bucket_first, bucket_last, count) in enumerate(
+                zip(firsts, lasts, timeline.total.buckets(firsts, lasts))
+            )
+        ]
+        return json.dumps(
+            {
+                "start": date.fromordinal(first).isoformat(),
+                "end": date.fromordinal(last).isoformat(),
+                "interval": interval,
+                "groupBy": groupBy,
+                "count": timeline.total.overlapping(first, last),
+                "groups": totals,
+                "buckets": buckets,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+
+    return cached_response(
+        request,
+        store,
+        version,
+        ("timeline", slug, first, last, interval, groupBy),
+        build,
+    )
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+import startup
+from faults import send_error
+from fixtures import FixtureStore, load_default_store, store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class FixtureLoader:
+    # Builds the default fixtures off the event loop, once, for stores
+    # started empty with MOCK_DEFER_FIXTURES.
+    def __init__(self, store: FixtureStore):
+        self.store = store
+        self.task: Optional[asyncio.Task] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def status(self) -> str:
+        if self.store.ready:
+            return "ready"
+        return "loading" if self.error is None else "failed"
+
+    def start(self) -> asyncio.Task:
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return self.task
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        try:
+            loaded = await asyncio.to_thread(load_default_store)
+        except Exception as error:
+            self.error = error
+            logger.exception("fixtures: deferred load failed")
+            raise
+        # Swapped in on the loop, like every other store update.
+        self.store.adopt(loaded)
+        self.store.ready = True
+        logger.info("fixtures: loaded in %.2fs", time.perf_counter() - started)
+        startup.report("fixtures loaded")
+
+
+loader = FixtureLoader(store)
+
+
+class ReadinessMiddleware:
+    # API requests arriving before a deferred load finishes wait for it
+    # (starting it if nothing has yet); /health and the rest do not.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            store.ready
+            or scope["type"] not in ("http", "websocket")
+            or not scope["path"].startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await asyncio.shield(loader.start())
+        except Exception:
+            if scope["type"] == "http":
+                await send_error(send, 503, "Fixtures failed to load")
+            else:
+                await send({"type": "websocket.close", "code": 1011})
+            return
+        await self.app(scope, receive, send)
+
+
+@router.get("/health")
+async def health():
+    status = loader.status
+    body = {
+        "status": status,
+        "projects": len(store.projects),
+        "startup": {
+            "importSeconds": startup.imported,
+            "fixtureSeconds": startup.phases.get("fixtures"),
+        },
+    }
+    if loader.error is not None:
+        body["detail"] = str(loader.error)
+    return JSONResponse(body, status_code=200 if status == "ready" else 503)
@@ -1,14 +1,80 @@
+# First, so MOCK_STARTUP_TRACE can time every import below it.
+import startup
+
+startup.trace_imports()
+
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fixtures import store
+from health import ReadinessMiddleware, loader, router as health_router
 from get_tasks import router as tasks_router
 from get_projects import router as projects_router
 from get_project import router as project_router
+from get_stats import router as stats_router
+from get_timeline import router as timeline_router
+from faults import FaultMiddleware, router as faults_router
+from metrics import MetricsMiddleware, router as metrics_router
+from push import change_scheduler, router as push_router
+from wal import journal
+from write_tasks import router as write_router
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+async def watch_fixtures(stopped: asyncio.Event) -> None:
+    if not store.ready:
+        await loader.start()
+    if store.source is None:
+        return
+    from watcher import FixtureWatcher
+
+    watcher = FixtureWatcher(store, store.source)
+    watcher.stopped = stopped
+    await watcher.run()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.report("imports")
+    # With MOCK_DEFER_FIXTURES the store starts empty and is built in a
+    # thread from here on, so uvicorn binds its socket right away.
+    deferred = not store.ready
+    if deferred:
+        loader.start()
+    stopped = asyncio.Event()
+    watching = asyncio.create_task(watch_fixtures(stopped))
+    scheduler = change_scheduler()
+    if scheduler is not None:
+        changes = asyncio.create_task(scheduler.run())
+    yield
+    if scheduler is not None:
+        changes.cancel()
+    # Let awatch shut its watcher thread down instead of cancelling it.
+    stopped.set()
+    if deferred and not store.ready:
+        watching.cancel()
+    await asyncio.gather(watching, return_exceptions=True)
+    journal.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(tasks_router)
+app.include_router(write_router)
 app.include_router(project_router)
 app.include_router(projects_router)
+app.include_router(stats_router)
+app.include_router(timeline_router)
+app.include_router(push_router)
+app.include_router(metrics_router)
+app.include_router(faults_router)
+app.include_router(health_router)
+# Innermost, so requests held until the fixtures load still pass through
+# faults, CORS and metrics like any other.
+app.add_middleware(ReadinessMiddleware)
+# Inside CORS, so injected errors still carry the headers browsers need.
+app.add_middleware(FaultMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Разрешает запросы с любых источников
@@ -16,6 +82,9 @@ app.add_middleware(
     allow_methods=["*"],  # Разрешает все HTTP-методы
     allow_headers=["*"],  # Разрешает все заголовки
 )
+# Added last so it is outermost and its timings include CORS handling.
+app.add_middleware(MetricsMiddleware)
+startup.mark_imported()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,191 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+UNMATCHED = "<unmatched>"
+
+# HDR-style log-linear buckets over microseconds: exact below 8us, then
+# four sub-buckets per power of two (at most 25% relative error) up to
+# about a minute. Finding a bucket is a couple of integer operations.
+SUB_BITS = 2
+SUB_BUCKETS = 1 << SUB_BITS
+LINEAR = SUB_BUCKETS * 2
+BUCKETS = 100
+
+
+def bucket_index(micros: int) -> int:
+    if micros < LINEAR:
+        return micros
+    shift = micros.bit_length() - SUB_BITS - 1
+    return min(BUCKETS - 1, shift * SUB_BUCKETS + (micros >> shift))
+
+
+def bucket_bound(index: int) -> float:
+    """Exclusive upper bound of a bucket, in seconds."""
+    if index < LINEAR:
+        return (index + 1) / 1e6
+    shift, top = divmod(index, SUB_BUCKETS)
+    return ((top + SUB_BUCKETS + 1) << (shift - 1)) / 1e6
+
+
+class Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bucket_index(int(seconds * 1e6))] += 1
+        self.total += seconds
+
+    def percentile(self, fraction: float) -> float:
+        # Upper bound of the bucket holding the nearest-rank observation.
+        rank = max(1, round(fraction * sum(self.counts)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return bucket_bound(index)
+        return 0.0
+
+
+class Series:
+    __slots__ = ("total", "handler", "validation", "serialization")
+
+    def __init__(self):
+        self.total = Histogram()
+        self.handler = Histogram()
+        self.validation = Histogram()
+        self.serialization = Histogram()
+
+
+# Keyed by (method, route template, status). The route is the template
+# the router matched, never the raw path, so cardinality stays bounded by
+# the number of routes.
+series: Dict[Tuple[str, str, int], Series] = {}
+
+# Seconds spent building and encoding response models for the current
+# request; cached_response adds to it, the middleware reads it back.
+phase_times: ContextVar[Optional[List[float]]] = ContextVar(
+    "phase_times", default=None
+)
+
+
+def record_phases(validation: float, serialization: float) -> None:
+    phases = phase_times.get()
+    if phases is not None:
+        phases[0] += validation
+        phases[1] += serialization
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.templates: Dict[object, str] = {}
+
+    def template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED
+        template = self.templates.get(endpoint)
+        if template is None:
+            template = UNMATCHED
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            self.templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        phases = [0.0, 0.0]
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = phase_times.set(phases)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - started
+            phase_times.reset(token)
+            key = (scope["method"], self.template(scope), status)
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = Series()
+            entry.total.observe(elapsed)
+            validation, serialization = phases
+            entry.handler.observe(elapsed - validation - serialization)
+            # Only cache misses build a response model; hits would just
+            # pile zeros into these.
+            if validation or serialization:
+                entry.validation.observe(validation)
+                entry.serialization.observe(serialization)
+
+
+def histogram_lines(labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    used = [index for index, count in enumerate(histogram.counts) if count]
+    cumulative = 0
+    for index in range(used[0], used[-1] + 1):
+        cumulative += histogram.counts[index]
+        lines.append(
+            f'mock_request_duration_seconds_bucket{{{labels},le="{bucket_bound(index):g}"}} '
+            f"{cumulative}"
+        )
+    lines.append(f'mock_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+    lines.append(f"mock_request_duration_seconds_sum{{{labels}}} {histogram.total:.9f}")
+    lines.append(f"mock_request_duration_seconds_count{{{labels}}} {cumulative}")
+    return lines
+
+
+def render() -> str:
+    from cache import response_cache
+
+    lines = [
+        "# HELP mock_request_duration_seconds Request latency, total and by phase.",
+        "# TYPE mock_request_duration_seconds histogram",
+    ]
+    for (method, route, status), entry in sorted(series.items()):
+        for phase in Series.__slots__:
+            histogram = getattr(entry, phase)
+            if not any(histogram.counts):
+                continue
+            labels = (
+                f'method="{method}",route="{route}",status="{status}",phase="{phase}"'
+            )
+            lines += histogram_lines(labels, histogram)
+
+    stats = response_cache.stats()
+    lines += [
+        "# HELP mock_response_cache_hits_total Response cache hits.",
+        "# TYPE mock_response_cache_hits_total counter",
+        f"mock_response_cache_hits_total {stats['hits']}",
+        "# HELP mock_response_cache_misses_total Response cache misses.",
+        "# TYPE mock_response_cache_misses_total counter",
+        f"mock_response_cache_misses_total {stats['misses']}",
+        "# HELP mock_response_cache_entries Encoded responses held in the cache.",
+        "# TYPE mock_response_cache_entries gauge",
+        f"mock_response_cache_entries {stats['size']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
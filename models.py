@@ -0,0 +1,193 @@
+from datetime import date
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class FrozenModel(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+
+class Status(FrozenModel):
+    id: str
+    name: str
+    color: str
+
+
+class Release(FrozenModel):
+    id: str
+    name: str
+    comment: str
+    released: str
+
+
+class Responsible(FrozenModel):
+    id: str
+    fullName: str
+    team: str
+
+
+class Section(FrozenModel):
+    id: str
+    name: str
+
+
+class Project(FrozenModel):
+    slug: str
+    name: str
+    status: Status
+    statuses: List[Status]
+    releases: List[Release]
+    responsibles: List[Responsible]
+    sections: List[Section]
+
+
+class ProjectsBatchRequest(BaseModel):
+    slugs: List[str]
+
+
+class ProjectsBatchResponse(BaseModel):
+    projects: Dict[str, Optional[Project]]
+
+
+class ProjectStatus(FrozenModel):
+    name: str
+    color: str
+
+
+class ProjectRelease(FrozenModel):
+    id: str
+    name: str
+    comment: str
+    released: date
+
+
+class ProjectSummary(FrozenModel):
+    slug: str
+    name: str
+    status: ProjectStatus
+    release: ProjectRelease
+
+
+class ProjectsResponse(BaseModel):
+    page: int
+    perPage: int
+    count: int
+    projects: List[ProjectSummary]
+    nextCursor: Optional[str] = None
+
+
+class Event(FrozenModel):
+    id: str
+    responsible: str
+    comment: str
+    risk: str
+    type: str
+    startedAt: date
+    endedAt: date
+
+
+class Task(FrozenModel):
+    id: str
+    name: str
+    comment: str
+    section: str
+    release: str
+    status: Status
+    events: List[Event]
+
+
+class TasksResponse(BaseModel):
+    page: int
+    perPage: int
+    count: int
+    tasks: List[Task]
+    nextCursor: Optional[str] = None
+
+
+class EventInput(BaseModel):
+    id: Optional[str] = Field(None, description="Generated when omitted")
+    responsible: str
+    comment: str = ""
+    risk: str
+    type: str
+    startedAt: date
+    endedAt: date
+
+
+class EventPatch(BaseModel):
+    responsible: Optional[str] = None
+    comment: Optional[str] = None
+    risk: Optional[str] = None
+    type: Optional[str] = None
+    startedAt: Optional[date] = None
+    endedAt: Optional[date] = None
+
+
+class TaskInput(BaseModel):
+    id: Optional[str] = Field(None, description="Generated when omitted")
+    name: str
+    comment: str = ""
+    section: str
+    release: str
+    status: str = Field(..., description="ID of one of the project's statuses")
+    events: List[EventInput] = []
+
+
+class TaskPatch(BaseModel):
+    name: Optional[str] = None
+    comment: Optional[str] = None
+    section: Optional[str] = None
+    release: Optional[str] = None
+    status: Optional[str] = None
+    events: Optional[List[EventInput]] = None
+
+
+class ProjectStats(BaseModel):
+    tasks: int
+    events: int
+    status: Dict[str, int]
+    release: Dict[str, int]
+    section: Dict[str, int]
+    risk: Dict[str, int]
+
+
+class TimelineBucket(BaseModel):
+    start: date
+    end: date
+    count: int
+    groups: Dict[str, int]
+
+
+class TimelineResponse(BaseModel):
+    start: date
+    end: date
+    interval: Literal["day", "week"]
+    groupBy: Literal["risk", "type", "responsible"]
+    count: int
+    groups: Dict[str, int]
+    buckets: List[TimelineBucket]
+
+
+class Scenario(FrozenModel):
+    # Same sources as the default store's MOCK_* settings, in that order
+    # of precedence; none of them means the hand-written fixtures.
+    directory: Optional[str] = None
+    file: Optional[str] = None
+    projects: int = Field(0, ge=0)
+    tasks: int = Field(1000, ge=0)
+    seed: int = 0
+    statuses: Optional[List[Status]] = Field(None, min_length=1)
+
+
+class FaultProfile(FrozenModel):
+    latency: Literal["none", "fixed", "normal", "longtail"] = "none"
+    latencyMs: float = Field(0, ge=0, description="Fixed delay, mean or median")
+    jitterMs: float = Field(0, ge=0, description="Standard deviation for normal")
+    sigma: float = Field(1.0, gt=0, description="Log-normal shape for longtail")
+    maxLatencyMs: Optional[float] = Field(None, ge=0)
+    bandwidthKbps: Optional[float] = Field(None, gt=0)
+    errorRate: float = Field(0, ge=0, le=1)
+    errorStatus: int = Field(503, ge=500, le=599)
+    timeoutRate: float = Field(0, ge=0, le=1)
+    timeoutMs: float = Field(30000, ge=0)
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import os
+import random
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from json.encoder import encode_basestring as quote
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
+
+from cache import evict_project
+from engine import TaskEngine
+from fixtures import FixtureStore, store
+from generator import EVENT_TYPES, RISKS
+from models import Event, Project, Task
+from records import task_json, task_row
+from scenarios import default_only
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(default_only)])
+
+# Messages a subscriber may fall behind by before its backlog is dropped
+# and it is told to refetch instead.
+QUEUE_SIZE = 256
+HEARTBEAT = 15.0
+# Reloads of projects larger than this are announced as a reset rather
+# than diffed task by task.
+DIFF_LIMIT = 20000
+
+
+class Message:
+    __slots__ = ("text", "frame")
+
+    def __init__(self, sequence: int, kind: str, text: str):
+        # Encoded once per broadcast; every subscriber gets these objects.
+        self.text = text
+        self.frame = f"id: {sequence}\nevent: {kind}\ndata: {text}\n\n".encode()
+
+
+def payload(kind: str, slug: str, version: Optional[str], body: str = "") -> str:
+    return '{"type":%s,"slug":%s,"version":%s%s}' % (
+        quote(kind),
+        quote(slug),
+        "null" if version is None else quote(version),
+        body,
+    )
+
+
+def delta_body(upserted: Iterable[str], deleted: Iterable[str]) -> str:
+    return ',"upserted":[%s],"deleted":[%s]' % (
+        ",".join(upserted),
+        ",".join(map(quote, deleted)),
+    )
+
+
+class Hub:
+    def __init__(self, store: FixtureStore):
+        self.store = store
+        self.channels: Dict[str, Set[asyncio.Queue]] = {}
+        self.sequence = 0
+
+    def subscribe(self, slug: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        self.channels.setdefault(slug, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, slug: str, queue: asyncio.Queue) -> None:
+        queues = self.channels.get(slug)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.channels[slug]
+
+    def message(self, kind: str, slug: str, body: str = "") -> Message:
+        self.sequence += 1
+        version = self.store.project_digests.get(slug)
+        return Message(self.sequence, kind, payload(kind, slug, version, body))
+
+    def publish(self, kind: str, slug: str, body: str = "") -> None:
+        queues = self.channels.get(slug)
+        if not queues:
+            return
+        message = self.message(kind, slug, body)
+        reset = None
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                if reset is None:
+                    reset = self.message("reset", slug)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(reset)
+
+    def on_store_change(
+        self, slug: str, previous: Optional[TaskEngine], engine: Optional[TaskEngine]
+    ) -> None:
+        if slug not in self.channels or previous is engine:
+            # Nobody listening, or an in-place update whose publisher
+            # sends the delta itself.
+            return
+        if engine is None:
+            self.publish("removed", slug)
+        elif previous is None or len(previous) + len(engine) > DIFF_LIMIT:
+            self.publish("reset", slug)
+        else:
+            before = {
+                row[0]: task_json(row) for row in previous.rows(previous.select({}))
+            }
+            after = {row[0]: task_json(row) for row in engine.rows(engine.select({}))}
+            upserted = [text for id, text in after.items() if before.get(id) != text]
+            deleted = [id for id in before if id not in after]
+            if upserted or deleted:
+                self.publish("tasks", slug, delta_body(upserted, deleted))
+
+
+hub = Hub(store)
+store.listeners.append(hub.on_store_change)
+
+
+# Mutates random tasks on a timer, as if someone were editing them.
+class ChangeScheduler:
+    def __init__(self, store: FixtureStore, hub: Hub, interval: float, batch: int):
+        self.store = store
+        self.hub = hub
+        self.interval = interval
+        self.batch = batch
+        self.rng = random.Random(os.environ.get("MOCK_CHANGE_SEED"))
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("change scheduler: tick failed")
+
+    def mutate(self, project: Project, task: Task) -> Task:
+        statuses = [
+            status for status in project.statuses if status.id != task.status.id
+        ]
+        update = {"status": self.rng.choice(statuses or project.statuses)}
+        if project.responsibles and self.rng.random() < 0.3:
+            started = date.today()
+            event = Event(
+                id=str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+                responsible=self.rng.choice(project.responsibles).id,
+                comment=task.comment,
+                risk=self.rng.choice(RISKS),
+                type=self.rng.choice(EVENT_TYPES),
+                startedAt=started,
+                endedAt=started + timedelta(days=self.rng.randrange(14)),
+            )
+            update["events"] = [*task.events, event]
+        return task.model_copy(update=update)
+
+    def tick(self) -> None:
+        # An engine shared between projects would change all of them while
+        # only the chosen one is republished, so those are left alone.
+        shared = Counter(map(id, self.store.engines.values()))
+        candidates = [
+            slug
+            for slug, engine in self.store.engines.items()
+            if len(engine) and shared[id(engine)] == 1
+        ]
+        if not candidates:
+            return
+        slug = self.rng.choice(candidates)
+        project = self.store.projects[slug]
+        engine = self.store.engines[slug]
+
+        evict_project(self.store, slug)
+        changed: List[Task] = []
+        for _ in range(self.batch):
+            position = self.rng.randrange(len(engine.tasks))
+            if engine.is_deleted(position):
+                continue
+            task = self.mutate(project, engine.tasks[position])
+            engine.update(position, task)
+            changed.append(task)
+        # Republishes the project under the engine's new digest.
+        self.store.written(slug)
+        self.hub.publish(
+            "tasks",
+            slug,
+            delta_body((task_json(task_row(task)) for task in changed), ()),
+        )
+
+
+def change_scheduler() -> Optional[ChangeScheduler]:
+    interval = float(os.environ.get("MOCK_CHANGE_INTERVAL", "0"))
+    if interval <= 0:
+        return None
+    return ChangeScheduler(
+        store, hub, interval, int(os.environ.get("MOCK_CHANGE_BATCH", "1"))
+    )
+
+
+async def iter_events(slug: str):
+    queue = hub.subscribe(slug)
+    try:
+        yield hub.message("ready", slug).frame
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            yield message.frame
+    finally:
+        hub.unsubscribe(slug, queue)
+
+
+@router.get("/api/project/{slug}/tasks/events")
+async def task_events(slug: str = Path(..., description="The slug of the project")):
+    if slug not in store.engines:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return StreamingResponse(
+        iter_events(slug),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/api/project/{slug}/tasks/ws")
+async def task_socket(websocket: WebSocket, slug: str):
+    if slug not in store.engines:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    queue = hub.subscribe(slug)
+    receiver = asyncio.ensure_future(websocket.receive())
+    getter = None
+    try:
+        await websocket.send_text(hub.message("ready", slug).text)
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                await websocket.send_text(getter.result().text)
+            else:
+                getter.cancel()
+            if receiver.done():
+                # Clients have nothing to say; anything but a close is ignored.
+                if receiver.result()["type"] == "websocket.disconnect":
+                    return
+                receiver = asyncio.ensure_future(websocket.receive())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if getter is not None:
+            getter.cancel()
+        hub.unsubscribe(slug, queue)
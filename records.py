@@ -0,0 +1,106 @@
+from datetime import date
+from json.encoder import encode_basestring as quote
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models import Status, Task
+
+# Internal task representation: plain tuples, no validation. Events are
+# (id, responsible, comment, risk, type, started ordinal, ended ordinal).
+EventRow = Tuple[str, str, str, str, str, int, int]
+TaskRow = Tuple[str, str, str, str, str, Status, List[EventRow]]
+
+_dates: Dict[int, str] = {}
+
+
+def task_row(task: Task) -> TaskRow:
+    return (
+        task.id,
+        task.name,
+        task.comment,
+        task.section,
+        task.release,
+        task.status,
+        [
+            (
+                event.id,
+                event.responsible,
+                event.comment,
+                event.risk,
+                event.type,
+                event.startedAt.toordinal(),
+                event.endedAt.toordinal(),
+            )
+            for event in task.events
+        ],
+    )
+
+
+def date_json(ordinal: int) -> str:
+    value = _dates.get(ordinal)
+    if value is None:
+        value = _dates[ordinal] = '"%s"' % date.fromordinal(ordinal).isoformat()
+    return value
+
+
+def status_json(status: Status) -> str:
+    return '{"id":%s,"name":%s,"color":%s}' % (
+        quote(status.id),
+        quote(status.name),
+        quote(status.color),
+    )
+
+
+# The encoders below produce exactly what model_dump_json would for the
+# same data: compact separators, UTF-8 text, fields in model order.
+def event_json(event: EventRow) -> str:
+    return (
+        '{"id":%s,"responsible":%s,"comment":%s,"risk":%s,"type":%s,'
+        '"startedAt":%s,"endedAt":%s}'
+        % (
+            quote(event[0]),
+            quote(event[1]),
+            quote(event[2]),
+            quote(event[3]),
+            quote(event[4]),
+            date_json(event[5]),
+            date_json(event[6]),
+        )
+    )
+
+
+def task_json(row: TaskRow) -> str:
+    return (
+        '{"id":%s,"name":%s,"comment":%s,"section":%s,"release":%s,'
+        '"status":%s,"events":[%s]}'
+        % (
+            quote(row[0]),
+            quote(row[1]),
+            quote(row[2]),
+            quote(row[3]),
+            quote(row[4]),
+            status_json(row[5]),
+            ",".join(map(event_json, row[6])),
+        )
+    )
+
+
+def page_json(
+    page: int,
+    per_page: int,
+    count: int,
+    field: str,
+    items: Sequence[str],
+    next_cursor: Optional[str],
+) -> bytes:
+    # TasksResponse / ProjectsResponse layout around pre-encoded items.
+    return (
+        '{"page":%d,"perPage":%d,"count":%d,"%s":[%s],"nextCursor":%s}'
+        % (
+            page,
+            per_page,
+            count,
+            field,
+            ",".join(items),
+            "null" if next_cursor is None else quote(next_cursor),
+        )
+    ).encode()
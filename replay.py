@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+from starlette.routing import Match
+
+from metrics import Histogram
+
+UNMATCHED = "<unmatched>"
+
+
+def open_log(path: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def timestamp(record: Dict[str, Any]) -> Optional[float]:
+    value = record.get("timestamp")
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return float(value)
+
+
+def iter_records(file: IO[str], stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    # One line at a time: capture logs can be far larger than memory.
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats["invalid"] += 1
+            continue
+        if not isinstance(record, dict) or "path" not in record:
+            stats["skipped"] += 1
+            continue
+        yield record
+
+
+def route_template(app, method: str, path: str) -> str:
+    scope = {"type": "http", "method": method, "path": path}
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or UNMATCHED
+
+
+def first_difference(expected: Any, actual: Any, where: str = "$") -> Optional[str]:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected.keys() | actual.keys():
+            if key not in actual or key not in expected:
+                return f"{where}.{key}"
+            found = first_difference(expected[key], actual[key], f"{where}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{where}.length"
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            found = first_difference(left, right, f"{where}[{index}]")
+            if found:
+                return found
+        return None
+    return None if expected == actual else where
+
+
+def compare(record: Dict[str, Any], response: httpx.Response) -> Optional[str]:
+    status = record.get("status")
+    if status is not None and status != response.status_code:
+        return f"status {status} != {response.status_code}"
+    if "response" not in record:
+        return None
+    expected = record["response"]
+    if isinstance(expected, str):
+        return None if expected == response.text else "$"
+    try:
+        actual = response.json()
+    except ValueError:
+        return "$"
+    return first_difference(expected, actual)
+
+
+class RouteStats:
+    # Latencies go into a fixed-size histogram, so memory stays flat however
+    # long the log; percentiles are bucket upper bounds, within 25%.
+    __slots__ = ("latencies", "slowest", "errors", "compared", "mismatches")
+
+    def __init__(self):
+        self.latencies = Histogram()
+        self.slowest = 0.0
+        self.errors = 0
+        self.compared = 0
+        self.mismatches = 0
+
+    def observe(self, seconds: float) -> None:
+        self.latencies.observe(seconds)
+        self.slowest = max(self.slowest, seconds)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        requests = sum(self.latencies.counts)
+
+        def milliseconds(fraction: float) -> float:
+            if not requests:
+                return 0.0
+            seconds = min(self.latencies.percentile(fraction), self.slowest)
+            return round(seconds * 1000, 3)
+
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": milliseconds(0.50),
+            "p95_ms": milliseconds(0.95),
+            "p99_ms": milliseconds(0.99),
+            "max_ms": round(self.slowest * 1000, 3),
+        }
+
+
+class Replayer:
+    def __init__(self, app, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.app = app
+        self.client = client
+        self.args = args
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.templates: Dict[Tuple[str, str], str] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self.max_lag = 0.0
+
+    def stats_for(self, method: str, path: str) -> RouteStats:
+        template = self.templates.get((method, path))
+        if template is None:
+            template = route_template(self.app, method, path)
+            if len(self.templates) < 65536:
+                self.templates[(method, path)] = template
+        stats = self.routes.get((method, template))
+        if stats is None:
+            stats = self.routes[(method, template)] = RouteStats()
+        return stats
+
+    async def send(self, record: Dict[str, Any]) -> None:
+        method = record.get("method", "GET").upper()
+        path = record["path"]
+        stats = self.stats_for(method, path)
+        body = record.get("body")
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method,
+                path,
+                params=record.get("query"),
+                headers=record.get("headers"),
+                json=body if body is not None and not isinstance(body, str) else None,
+                content=body if isinstance(body, str) else None,
+            )
+        except httpx.HTTPError as exc:
+            stats.observe(time.perf_counter() - started)
+            stats.errors += 1
+            self.sample(method, path, type(exc).__name__)
+            return
+        stats.observe(time.perf_counter() - started)
+        if response.status_code >= 500:
+            stats.errors += 1
+        if "status" in record or "response" in record:
+            stats.compared += 1
+            difference = compare(record, response)
+            if difference is not None:
+                stats.mismatches += 1
+                self.sample(method, path, difference)
+
+    def sample(self, method: str, path: str, difference: str) -> None:
+        if len(self.samples) < self.args.samples:
+            self.samples.append({"method": method, "path": path, "diff": difference})
+
+    async def run(self, file: IO[str], stats: Dict[str, int]) -> float:
+        pending = set()
+        origin = start = None
+        started = time.perf_counter()
+        for record in iter_records(file, stats):
+            if self.args.limit and stats["replayed"] >= self.args.limit:
+                break
+            when = timestamp(record) if self.args.speed else None
+            if when is not None:
+                if origin is None:
+                    origin, start = when, time.perf_counter()
+                due = start + (when - origin) / self.args.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_lag = max(self.max_lag, -delay)
+            # Bound what is in flight so a slow server cannot make the
+            # replayer buffer the rest of the log.
+            while len(pending) >= self.args.concurrency:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+            pending.add(asyncio.create_task(self.send(record)))
+            stats["replayed"] += 1
+        for task in pending:
+            await task
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float, stats: Dict[str, int]) -> Dict[str, Any]:
+        routes = {}
+        for (method, template), route in sorted(self.routes.items()):
+            result = route.summary(elapsed)
+            result["compared"] = route.compared
+            result["mismatches"] = route.mismatches
+            routes[f"{method} {template}"] = result
+        return {
+            "log": self.args.log,
+            "speed": self.args.speed,
+            "url": self.args.url,
+            "elapsed_s": round(elapsed, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            **stats,
+            "routes": routes,
+            "mismatch_samples": self.samples,
+        }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import app
+
+    if args.url is None:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://mock"
+        )
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits)
+
+    stats = {"replayed": 0, "skipped": 0, "invalid": 0}
+    replayer = Replayer(app, client, args)
+    async with client:
+        with open_log(args.log) as file:
+            elapsed = await replayer.run(file, stats)
+    return replayer.report(elapsed, stats)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a JSONL log of recorded requests against the mock API"
+    )
+    parser.add_argument(
+        "log",
+        help="JSONL (optionally .gz) with one "
+        '{"timestamp", "method", "path", "query", "headers", "body", '
+        '"status", "response"} record per line',
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="timing multiplier; 2 replays twice as fast, 0 ignores timestamps",
+    )
+    parser.add_argument("--url", help="replay against a running server")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--limit", type=int, help="stop after this many requests")
+    parser.add_argument(
+        "--samples", type=int, default=20, help="mismatches to include in the report"
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
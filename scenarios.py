@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path as FilePath
+from typing import Dict, Optional, Tuple
+
+import yaml
+from fastapi import Header, HTTPException, Query, WebSocketException
+from starlette.requests import HTTPConnection
+
+from cache import ResponseCache
+from fixtures import FixtureStore, load_store, store
+from models import Scenario
+
+logger = logging.getLogger(__name__)
+
+
+def load_scenarios(path: str) -> Dict[str, Scenario]:
+    raw = FilePath(path).read_text(encoding="utf-8")
+    data = json.loads(raw) if path.endswith(".json") else yaml.safe_load(raw)
+    return {name: Scenario.model_validate(spec) for name, spec in data.items()}
+
+
+class Scenarios:
+    # Named stores, each with its own engines, indexes and response cache,
+    # loaded on first use. Least recently used ones are dropped once their
+    # combined size goes over budget; in-flight requests keep theirs alive.
+    def __init__(self, specs: Dict[str, Scenario], budget: int, cache_size: int):
+        self.specs = specs
+        self.budget = budget
+        self.cache_size = cache_size
+        self.loaded: "OrderedDict[str, Tuple[FixtureStore, int]]" = OrderedDict()
+        self.loading: Dict[str, asyncio.Future] = {}
+
+    async def get(self, name: str) -> FixtureStore:
+        entry = self.loaded.get(name)
+        if entry is not None:
+            self.loaded.move_to_end(name)
+            return entry[0]
+        spec = self.specs.get(name)
+        if spec is None:
+            raise HTTPException(status_code=404, detail="Scenario not found")
+
+        future = self.loading.get(name)
+        if future is None:
+            # Off the event loop, so other scenarios keep serving; requests
+            # for this one all wait on the same load.
+            future = self.loading[name] = asyncio.ensure_future(
+                asyncio.to_thread(self.load, spec)
+            )
+            future.add_done_callback(lambda _: self.loading.pop(name, None))
+        loaded, size = await asyncio.shield(future)
+        if name not in self.loaded:
+            self.loaded[name] = (loaded, size)
+            logger.info("scenario %s: loaded, %.1f MB", name, size / 2**20)
+            self.evict(keep=name)
+        return loaded
+
+    def load(self, spec: Scenario) -> Tuple[FixtureStore, int]:
+        loaded = load_store(
+            spec.directory,
+            spec.file,
+            spec.projects,
+            spec.tasks,
+            spec.seed,
+            spec.statuses,
+        )
+        loaded.cache = ResponseCache(self.cache_size)
+        return loaded, loaded.nbytes()
+
+    def evict(self, keep: str) -> None:
+        total = sum(size for _, size in self.loaded.values())
+        for name in list(self.loaded):
+            if total <= self.budget:
+                break
+            if name != keep:
+                total -= self.loaded.pop(name)[1]
+                logger.info("scenario %s: evicted", name)
+
+
+scenarios = Scenarios(
+    load_scenarios(os.environ["MOCK_SCENARIOS"])
+    if os.environ.get("MOCK_SCENARIOS")
+    else {},
+    int(float(os.environ.get("MOCK_SCENARIO_MEMORY_MB", "512")) * 2**20),
+    int(os.environ.get("MOCK_SCENARIO_CACHE_SIZE", "1024")),
+)
+
+
+async def current_store(
+    scenario: Optional[str] = Query(
+        None, description="Scenario to serve instead of the default fixtures"
+    ),
+    x_mock_scenario: Optional[str] = Header(
+        None, description="Scenario to serve, unless the scenario parameter is set"
+    ),
+) -> FixtureStore:
+    name = scenario or x_mock_scenario
+    if not name:
+        return store
+    return await scenarios.get(name)
+
+
+def default_only(connection: HTTPConnection) -> None:
+    # Writes and push streams only ever apply to the default fixtures, so a
+    # scenario selector is refused rather than silently ignored.
+    if connection.query_params.get("scenario") or connection.headers.get(
+        "x-mock-scenario"
+    ):
+        if connection.scope["type"] == "websocket":
+            raise WebSocketException(code=4400, reason="Scenarios are read-only")
+        raise HTTPException(status_code=400, detail="Scenarios are read-only")
@@ -0,0 +1,146 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+from engine import to_bitmap, with_position, without_position
+from models import Task
+
+TOKEN = re.compile(r"\w+")
+# Sorts after every character a term can contain, so [prefix, prefix +
+# PREFIX_END) spans all terms starting with prefix.
+PREFIX_END = "\U0010ffff"
+
+Postings = Union[int, array]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.casefold().replace("ё", "е"))
+
+
+def query_terms(q: str) -> tuple:
+    return tuple(sorted(set(tokenize(q)))) if q else ()
+
+
+def task_terms(task: Task) -> set:
+    terms = set(tokenize(task.name))
+    terms.update(tokenize(task.comment))
+    for event in task.events:
+        terms.update(tokenize(event.comment))
+    return terms
+
+
+def text_postings(tasks: Sequence[Task]) -> Mapping[str, Sequence[int]]:
+    # Distinct searchable text -> positions of the tasks containing it, so
+    # repeated names and comments are tokenized once.
+    if hasattr(tasks, "text_postings"):
+        return tasks.text_postings()
+    postings: Dict[str, array] = {}
+    for position, task in enumerate(tasks):
+        texts = {task.name, task.comment}
+        texts.update(event.comment for event in task.events)
+        for text in texts:
+            positions = postings.get(text)
+            if positions is None:
+                positions = postings[text] = array("I")
+            positions.append(position)
+    return postings
+
+
+# Case-folded term -> tasks over names and task/event comments. Terms
+# whose postings would take more room as an array than as a bitmap are
+# stored as bitmaps, the rest as sorted position arrays. Every query word
+# matches as a prefix: the vocabulary is sorted, so the terms it covers are
+# one bisected range.
+class SearchIndex:
+    def __init__(
+        self, size: int, postings: Dict[str, Postings], cache_size: int = 64
+    ):
+        self.size = size
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.cache_size = cache_size
+        self._prefixes: "OrderedDict[str, int]" = OrderedDict()
+
+    @classmethod
+    def build(cls, tasks: Sequence[Task]) -> "SearchIndex":
+        size = len(tasks)
+        texts = text_postings(tasks)
+        tokens = {text: set(tokenize(text)) for text in texts}
+
+        counts: Dict[str, int] = {}
+        for text, positions in texts.items():
+            for term in tokens[text]:
+                counts[term] = counts.get(term, 0) + len(positions)
+        dense = {term for term, count in counts.items() if count * 32 >= size}
+
+        bitmaps: Dict[str, int] = dict.fromkeys(dense, 0)
+        sparse: Dict[str, List[Sequence[int]]] = {}
+        for text, positions in texts.items():
+            bits = None
+            for term in tokens[text]:
+                if term in dense:
+                    if bits is None:
+                        bits = to_bitmap(positions, size)
+                    bitmaps[term] |= bits
+                else:
+                    sparse.setdefault(term, []).append(positions)
+
+        postings: Dict[str, Postings] = dict(bitmaps)
+        for term, lists in sparse.items():
+            postings[term] = array("I", sorted(set(chain.from_iterable(lists))))
+        return cls(size, postings)
+
+    def terms(self, prefix: str) -> List[str]:
+        vocabulary = self.vocabulary
+        start = bisect_left(vocabulary, prefix)
+        return vocabulary[start : bisect_left(vocabulary, prefix + PREFIX_END, start)]
+
+    def bitmap(self, prefix: str) -> int:
+        bits = self._prefixes.get(prefix)
+        if bits is not None:
+            self._prefixes.move_to_end(prefix)
+            return bits
+
+        bits = 0
+        sparse: List[Iterable[int]] = []
+        for term in self.terms(prefix):
+            postings = self.postings[term]
+            if isinstance(postings, int):
+                bits |= postings
+            else:
+                sparse.append(postings)
+        if sparse:
+            bits |= to_bitmap(chain.from_iterable(sparse), self.size)
+
+        self._prefixes[prefix] = bits
+        while len(self._prefixes) > self.cache_size:
+            self._prefixes.popitem(last=False)
+        return bits
+
+    def update(
+        self, position: int, previous: Optional[Task], task: Optional[Task]
+    ) -> None:
+        # previous is None for an inserted task, task None for a deleted one.
+        before = task_terms(previous) if previous is not None else set()
+        after = task_terms(task) if task is not None else set()
+        self.size = max(self.size, position + 1)
+        for term in before - after:
+            postings = self.postings[term]
+            if isinstance(postings, int):
+                self.postings[term] = postings & ~(1 << position)
+            else:
+                self.postings[term] = without_position(postings, position)
+        for term in after - before:
+            postings = self.postings.get(term)
+            if postings is None:
+                insort(self.vocabulary, term)
+                self.postings[term] = array("I", [position])
+            elif isinstance(postings, int):
+                self.postings[term] = postings | (1 << position)
+            else:
+                self.postings[term] = with_position(postings, position)
+        if before != after:
+            self._prefixes.clear()
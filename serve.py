@@ -0,0 +1,181 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+RESPAWN_DELAY = 1.0
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, args: argparse.Namespace) -> None:
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        backlog=args.backlog,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    def __init__(self, app, sock: socket.socket, args: argparse.Namespace):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, float] = {}
+        self.stopping = False
+        self.reloading = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.app, self.sock, self.args)
+            finally:
+                os._exit(0)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            print(
+                f"worker {pid} exited with status {os.waitstatus_to_exitcode(status)}",
+                file=sys.stderr,
+            )
+            # Avoid a tight fork loop when workers crash on startup.
+            if time.monotonic() - started < RESPAWN_DELAY:
+                time.sleep(RESPAWN_DELAY)
+            self.spawn()
+
+    def wait(self, pids, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while any(pid in self.workers for pid in pids):
+            if time.monotonic() > deadline:
+                for pid in pids:
+                    if pid in self.workers:
+                        os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            for pid in pids:
+                if pid not in self.workers:
+                    continue
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    self.workers.pop(pid, None)
+            time.sleep(0.05)
+
+    def restart(self) -> None:
+        # Rolling restart: the replacement is accepting before the old
+        # worker starts draining, so the socket is never left unserved.
+        for pid in list(self.workers):
+            self.spawn()
+            os.kill(pid, signal.SIGTERM)
+            self.wait([pid], self.args.graceful_timeout + 5)
+
+    def stop(self) -> None:
+        self.stopping = True
+        pids = list(self.workers)
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        self.wait(pids, self.args.graceful_timeout + 5)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.on_stop)
+        signal.signal(signal.SIGINT, self.on_stop)
+        signal.signal(signal.SIGHUP, self.on_reload)
+        for _ in range(self.args.workers):
+            self.spawn()
+        print(
+            f"serving on {self.args.host}:{self.args.port} "
+            f"with {self.args.workers} workers (master {os.getpid()})",
+            file=sys.stderr,
+        )
+        while not self.stopping:
+            if self.reloading:
+                self.reloading = False
+                self.restart()
+            self.reap()
+            time.sleep(0.2)
+        self.stop()
+
+    def on_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def on_reload(self, signum, frame) -> None:
+        self.reloading = True
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the mock API with pre-forked workers sharing fixtures"
+    )
+    parser.add_argument("--host", default=os.environ.get("MOCK_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=env_int("MOCK_PORT", 8000))
+    parser.add_argument(
+        "--workers", type=int, default=env_int("MOCK_WORKERS", os.cpu_count() or 1)
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=env_int("MOCK_GRACEFUL_TIMEOUT", 30),
+        help="seconds a worker may spend draining requests on restart",
+    )
+    parser.add_argument("--backlog", type=int, default=env_int("MOCK_BACKLOG", 2048))
+    parser.add_argument(
+        "--log-level", default=os.environ.get("MOCK_LOG_LEVEL", "warning")
+    )
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        parser.error("the pre-fork launcher needs os.fork; use main.py instead")
+    if args.workers > 1 and os.environ.get("MOCK_WAL_DIR"):
+        # Each worker would apply and compact its own writes into the same
+        # directory, deleting logs the others are still appending to.
+        parser.error("MOCK_WAL_DIR needs --workers 1: writes are per process")
+
+    # Build the fixture store once in the master; workers inherit it
+    # copy-on-write. Freezing the GC keeps collections in the workers
+    # from touching (and so copying) those pages.
+    from main import app
+
+    gc.collect()
+    gc.freeze()
+
+    sock = bind(args.host, args.port, args.backlog)
+    Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
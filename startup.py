@@ -0,0 +1,78 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Standard library only: main imports this first, before anything it would
+# otherwise time.
+TRACE = os.environ.get("MOCK_STARTUP_TRACE", "") not in ("", "0")
+# Imports listed in the trace report, slowest first.
+TOP_IMPORTS = 25
+
+started = time.perf_counter()
+imported: Optional[float] = None
+# Self time per module, excluding the modules it imported in turn.
+imports: Dict[str, float] = {}
+# Wall time per fixture build step, summed over every engine built.
+phases: Dict[str, float] = {}
+
+_import = builtins.__import__
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _import(name, globals, locals, fromlist, level)
+    stack: List[float] = getattr(_local, "stack", None) or []
+    _local.stack = stack
+    stack.append(0.0)
+    begin = time.perf_counter()
+    try:
+        return _import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - begin
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with _lock:
+            imports[name] = imports.get(name, 0.0) + elapsed - children
+
+
+def trace_imports() -> None:
+    if TRACE:
+        builtins.__import__ = timed_import
+
+
+def mark_imported() -> None:
+    global imported
+    imported = time.perf_counter() - started
+    builtins.__import__ = _import
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - begin
+        with _lock:
+            phases[name] = phases.get(name, 0.0) + elapsed
+
+
+def report(title: str) -> None:
+    if not TRACE:
+        return
+    lines = [f"startup: {title}"]
+    if imported is not None:
+        lines.append(f"  {'imports (wall)':<44}{imported * 1000:10.1f} ms")
+    slowest = sorted(imports.items(), key=lambda item: -item[1])[:TOP_IMPORTS]
+    for name, seconds in slowest:
+        lines.append(f"  import {name:<37}{seconds * 1000:10.1f} ms")
+    for name, seconds in phases.items():
+        lines.append(f"  build {name:<38}{seconds * 1000:10.1f} ms")
+    print("\n".join(lines), file=sys.stderr, flush=True)
@@ -0,0 +1,18 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from fixtures import FixtureStore
+from main import app
+
+
+@pytest.fixture
+def generated():
+    store = FixtureStore.generate(1, 3000, 11)
+    slug = next(iter(store.engines))
+    return store.projects[slug], store.engines[slug]
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,21 @@
+import columnar
+from fixtures import FixtureStore
+
+
+def test_columnar_round_trip(tmp_path):
+    store = FixtureStore.generate(2, 2000, 3)
+    path = str(tmp_path / "fixtures.col")
+    columnar.write(path, list(store.projects.values()), store.engines)
+    projects, engines = columnar.load(path)
+    assert projects == list(store.projects.values())
+    for slug, engine in engines.items():
+        original = store.engines[slug]
+        positions = range(len(engine.tasks))
+        expected = [task.model_dump_json() for task in original.tasks]
+        assert engine.encode(positions) == expected
+        assert engine.digest == original.digest
+        # Indexes are mapped from the file rather than rebuilt.
+        section = next(iter(original.indexes["section"]))
+        assert engine.page({"section": [section]}, 0, 50) == original.page(
+            {"section": [section]}, 0, 50
+        )
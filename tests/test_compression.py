@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import json
+
+from starlette.requests import Request
+
+import cache
+from cache import EncodingResponse, cached_response
+from fixtures import store
+
+
+def request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [
+                (name.encode(), value.encode()) for name, value in headers.items()
+            ],
+        }
+    )
+
+
+def test_each_encoding_has_its_own_etag(client):
+    url = "/api/project/pik/tasks?perPage=100"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.json() == plain.json()
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+    for etag, coding in (
+        (plain.headers["etag"], "identity"),
+        (zipped.headers["etag"], "gzip"),
+    ):
+        response = client.get(
+            url, headers={"Accept-Encoding": coding, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    # A validator for one encoding does not revalidate the other.
+    response = client.get(
+        url,
+        headers={
+            "Accept-Encoding": "identity",
+            "If-None-Match": zipped.headers["etag"],
+        },
+    )
+    assert response.status_code == 200
+
+
+def test_large_bodies_are_compressed_once_off_the_loop(monkeypatch):
+    calls = []
+    compress = cache.COMPRESSORS["gzip"]
+    monkeypatch.setitem(
+        cache.COMPRESSORS, "gzip", lambda body: calls.append(1) or compress(body)
+    )
+    payload = {"tasks": [{"id": str(number)} for number in range(20000)]}
+    body = json.dumps(payload).encode()
+    assert len(body) >= cache.INLINE_COMPRESS
+
+    response = cached_response(
+        request(**{"accept-encoding": "gzip"}),
+        store,
+        "test-version",
+        ("compression",),
+        lambda: body,
+    )
+    assert isinstance(response, EncodingResponse)
+    assert response.headers["etag"].endswith('-gzip"')
+
+    async def send_all():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await asyncio.gather(
+            *(response.entry.encode("gzip") for _ in range(8)),
+            response({"type": "http"}, None, send),
+        )
+        return sent
+
+    sent = asyncio.run(send_all())
+    assert calls == [1]
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert json.loads(gzip.decompress(sent[1]["body"])) == payload
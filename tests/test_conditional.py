@@ -0,0 +1,67 @@
+import pytest
+
+from fixtures import store
+
+URLS = [
+    "/api/projects?status=Новый",
+    "/api/projects/pik",
+    "/api/project/pik/tasks",
+    "/api/project/pik/stats",
+    "/api/project/pik/timeline",
+]
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_etag_revalidation(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        revalidated = client.get(url, headers={"If-None-Match": header})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_if_none_match_takes_precedence(client):
+    url = "/api/projects/pik"
+    response = client.get(url)
+    headers = {
+        "If-None-Match": '"other"',
+        "If-Modified-Since": response.headers["last-modified"],
+    }
+    assert client.get(url, headers=headers).status_code == 200
+
+
+def test_if_modified_since_after_writes(client):
+    # Last-Modified only has whole seconds, so it validates nothing once
+    # the store changed twice within one of them.
+    slug = next(iter(store.projects))
+    project = store.projects[slug]
+    url = f"/api/project/{slug}/tasks"
+    task = {
+        "name": "Задача",
+        "comment": "",
+        "section": project.sections[0].id,
+        "release": project.releases[0].id,
+        "status": project.statuses[0].id,
+        "events": [],
+    }
+    first = client.post(url, json=task).json()
+    response = client.get(url)
+    modified = response.headers["last-modified"]
+    client.delete(f"{url}/{first['id']}")
+    stale = client.get(url, headers={"If-Modified-Since": modified})
+    assert stale.status_code == 200
+    assert stale.json()["count"] == response.json()["count"] - 1
+
+    current = client.get(url, headers={"If-Modified-Since": modified})
+    revalidated = client.get(
+        url, headers={"If-Modified-Since": current.headers["last-modified"]}
+    )
+    assert revalidated.status_code == (304 if store.last_modified_exact else 200)
+    malformed = client.get(url, headers={"If-Modified-Since": "yesterday"})
+    assert malformed.status_code == 200
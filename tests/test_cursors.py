@@ -0,0 +1,78 @@
+import pytest
+
+from engine import TaskEngine
+from fixtures import FixtureStore, store
+
+
+@pytest.fixture
+def generated_projects():
+    generated = FixtureStore.generate(8, 300, 21)
+    for slug, project in generated.projects.items():
+        store.replace(project, generated.engines[slug])
+    yield generated
+    for slug in generated.projects:
+        store.remove(slug)
+
+
+def walk(client, url, cursor, items, limit=100):
+    ids = []
+    while cursor is not None and limit:
+        page = client.get(url, params={"cursor": cursor}).json()
+        key = "slug" if items == "projects" else "id"
+        ids += [item[key] for item in page[items]]
+        cursor = page["nextCursor"]
+        limit -= 1
+    return ids
+
+
+def test_project_cursor_survives_removals(client, generated_projects):
+    by_status = store.summaries_by_status
+    status = max(by_status, key=lambda status: len(by_status[status]))
+    url = f"/api/projects?status={status}&perPage=2"
+    listed = [summary.slug for summary in by_status[status]]
+    assert walk(client, url, "", "projects") == listed
+
+    first = client.get(url, params={"cursor": ""}).json()
+    gone = [slug for slug in listed[1:] if slug in generated_projects.projects][:2]
+    for slug in gone:
+        store.remove(slug)
+    rest = walk(client, url, first["nextCursor"], "projects")
+    assert rest == [slug for slug in listed[2:] if slug not in gone]
+
+
+def test_task_cursor_survives_writes_and_reload(client, generated_projects):
+    slug = next(iter(generated_projects.projects))
+    project = store.projects[slug]
+    url = f"/api/project/{slug}/tasks?perPage=25"
+    engine = store.engines[slug]
+    ids = [task.id for task in engine.get(engine.select({}))]
+    assert walk(client, url, "", "tasks") == ids
+
+    page = client.get(url, params={"cursor": ""}).json()
+    cursor = page["nextCursor"]
+    assert client.delete(f"/api/project/{slug}/tasks/{ids[30]}").status_code == 204
+    expected = ids[25:30] + ids[31:]
+    assert walk(client, url, cursor, "tasks") == expected
+
+    # A reload puts every task at a new position; the cursor still
+    # continues after the task it was handed out for.
+    engine = store.engines[slug]
+    tasks = engine.get(engine.select({}))
+    moved = tasks[100:] + tasks[:100]
+    store.replace(project, TaskEngine(moved))
+    after = [task.id for task in moved]
+    last = after.index(ids[24])
+    assert walk(client, url, cursor, "tasks") == after[last + 1 :]
+
+    store.replace(project, TaskEngine([task for task in moved if task.id != ids[24]]))
+    response = client.get(url, params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+# "nope", "task:5" from before cursors held ids, "task:x:t", "project:1".
+@pytest.mark.parametrize(
+    "cursor", ["bm9wZQ", "dGFzazo1", "dGFzazp4OnQ", "cHJvamVjdDox"]
+)
+def test_malformed_task_cursors_are_rejected(client, cursor):
+    response = client.get("/api/project/pik/tasks", params={"cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from search import task_terms
+
+
+def task_values(task, field):
+    if field == "responsible":
+        return {event.responsible for event in task.events}
+    if field == "status":
+        return {task.status.id}
+    return {getattr(task, field)}
+
+
+def brute_force(engine, filters, terms=()):
+    positions = []
+    for position in range(len(engine.tasks)):
+        if engine.is_deleted(position):
+            continue
+        task = engine.tasks[position]
+        if any(
+            values and not task_values(task, field) & set(values)
+            for field, values in filters.items()
+        ):
+            continue
+        words = task_terms(task)
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            positions.append(position)
+    return positions
+
+
+def mutate(engine, project, rng, count):
+    for _ in range(count):
+        position = rng.randrange(len(engine.tasks))
+        if engine.is_deleted(position):
+            continue
+        task = engine.tasks[position]
+        choice = rng.random()
+        if choice < 0.3:
+            engine.delete(position)
+        elif choice < 0.6:
+            engine.insert(
+                task.model_copy(
+                    update={
+                        "id": f"inserted-{rng.getrandbits(64)}",
+                        "section": rng.choice(project.sections).id,
+                        "name": f"zzinserted {task.name}",
+                    }
+                )
+            )
+        else:
+            engine.update(
+                position,
+                task.model_copy(
+                    update={
+                        "status": rng.choice(project.statuses),
+                        "release": rng.choice(project.releases).id,
+                        "events": task.events[:1],
+                    }
+                ),
+            )
+
+
+def sample_filters(project, rng):
+    yield {}
+    yield {"section": [project.sections[0].id]}
+    yield {"status": [status.id for status in project.statuses[:2]]}
+    for _ in range(8):
+        yield {
+            "section": rng.sample([s.id for s in project.sections], 2),
+            "release": [rng.choice(project.releases).id],
+            "responsible": [rng.choice(project.responsibles).id],
+        }
+
+
+@pytest.mark.parametrize("rounds", [0, 1, 3])
+def test_page_and_seek_match_brute_force(generated, rounds):
+    project, engine = generated
+    rng = random.Random(rounds)
+    for _ in range(rounds):
+        mutate(engine, project, rng, 200)
+    for filters in sample_filters(project, rng):
+        expected = brute_force(engine, filters)
+        count, positions = engine.page(filters, 0, len(engine.tasks))
+        assert (count, positions) == (len(expected), expected)
+        count, positions = engine.page(filters, 7, 25)
+        assert positions == expected[7:32]
+        if expected:
+            after = expected[len(expected) // 2]
+            count, positions = engine.seek(filters, after, 25)
+            assert positions == [p for p in expected if p > after][:25]
+
+
+
+@pytest.mark.parametrize("prebuilt", [False, True])
+def test_position_tracks_writes(generated, prebuilt):
+    project, engine = generated
+    first, second = engine.tasks[0], engine.tasks[1]
+    if prebuilt:
+        assert engine.position(first.id) == 0
+    engine.update(0, first.model_copy(update={"id": "renamed"}))
+    engine.delete(1)
+    position = engine.insert(second.model_copy(update={"id": "appended"}))
+    assert engine.position("renamed") == 0
+    assert engine.position(first.id) is None
+    assert engine.position(second.id) is None
+    assert engine.position("appended") == position
+    assert engine.position(engine.tasks[2].id) == 2
@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+import engine as engine_module
+import search
+import timeline
+from fixtures import FixtureStore
+from test_engine import brute_force, mutate
+
+
+def assert_timeline_current(engine):
+    fresh = timeline.TimelineIndex.build(engine.get(engine.select({})))
+    assert engine.timeline.total.count == fresh.total.count
+    for group, intervals in fresh.groups.items():
+        assert {
+            label: (value.starts, value.ends)
+            for label, value in engine.timeline.groups[group].items()
+        } == {label: (value.starts, value.ends) for label, value in intervals.items()}
+
+
+def test_indexes_catch_up_with_earlier_writes(generated):
+    project, engine = generated
+    rng = random.Random(5)
+    mutate(engine, project, rng, 100)
+    # Built lazily here, then kept current by later writes.
+    assert list(engine.select({}, ["zzinserted"])) == brute_force(
+        engine, {}, ["zzinserted"]
+    )
+    engine.timeline
+    mutate(engine, project, rng, 100)
+    for terms in (["zzinserted"], ["a"]):
+        assert list(engine.select({}, terms)) == brute_force(engine, {}, terms)
+    assert_timeline_current(engine)
+
+
+def test_writes_during_a_threaded_build(generated):
+    project, engine = generated
+    rng = random.Random(7)
+
+    async def load():
+        loading = asyncio.gather(engine.load_search(), engine.load_timeline())
+        await asyncio.sleep(0)
+        mutate(engine, project, rng, 100)
+        await loading
+
+    asyncio.run(load())
+    mutate(engine, project, rng, 100)
+    assert list(engine.select({}, ["zzinserted"])) == brute_force(
+        engine, {}, ["zzinserted"]
+    )
+    assert_timeline_current(engine)
+
+
+def test_concurrent_loads_build_once(generated, monkeypatch):
+    project, engine = generated
+    builds = []
+    for module, name in ((search, "SearchIndex"), (timeline, "TimelineIndex")):
+        index = getattr(module, name)
+        build = index.build
+        monkeypatch.setattr(
+            index,
+            "build",
+            lambda tasks, name=name, build=build: builds.append(name) or build(tasks),
+        )
+
+    async def load():
+        await asyncio.gather(
+            *(engine.load_search() for _ in range(8)),
+            *(engine.load_timeline() for _ in range(4)),
+        )
+
+    asyncio.run(load())
+    assert sorted(builds) == ["SearchIndex", "TimelineIndex"]
+
+
+def test_concurrent_id_loads_build_once(generated, monkeypatch):
+    project, engine = generated
+    builds = []
+    base_ids = engine_module.base_ids
+    monkeypatch.setattr(
+        engine_module, "base_ids", lambda base: builds.append(1) or base_ids(base)
+    )
+
+    async def load():
+        await asyncio.gather(*(engine.load_ids() for _ in range(8)))
+
+    asyncio.run(load())
+    assert builds == [1]
+    assert engine.position(engine.tasks[10].id) == 10
+
+
+def test_loaded_follows_a_reload_during_the_build():
+    store = FixtureStore.generate(2, 200, 3)
+    slug, other = list(store.engines)
+    replacement = store.engines[other]
+    loads = []
+
+    async def load(engine):
+        loads.append(engine)
+        if len(loads) == 1:
+            store.replace(store.projects[slug], replacement)
+        await engine.load_timeline()
+
+    engine = asyncio.run(store.loaded(slug, load))
+    assert engine is replacement is loads[-1]
+    assert len(loads) == 2
+    store.remove(slug)
+    assert asyncio.run(store.loaded(slug, load)) is None
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from engine import TaskEngine
+from fixtures import FixtureStore, store
+from push import iter_events
+from records import task_json, task_row
+
+
+@pytest.fixture
+def project():
+    generated = FixtureStore.generate(1, 200, 13)
+    slug, engine = next(iter(generated.engines.items()))
+    store.replace(generated.projects[slug], engine)
+    yield generated.projects[slug]
+    store.remove(slug)
+
+
+def frame_data(frame):
+    lines = frame.decode().splitlines()
+    return lines[1][len("event: ") :], json.loads(lines[2][len("data: ") :])
+
+
+def test_socket_receives_write_deltas(client, project):
+    slug = project.slug
+    with client.websocket_connect(f"/api/project/{slug}/tasks/ws") as socket:
+        ready = socket.receive_json()
+        assert ready["type"] == "ready"
+        assert ready["version"] == store.project_digests[slug]
+
+        task = {
+            "name": "Задача",
+            "comment": "",
+            "section": project.sections[0].id,
+            "release": project.releases[0].id,
+            "status": project.statuses[0].id,
+            "events": [],
+        }
+        created = client.post(f"/api/project/{slug}/tasks", json=task).json()
+        delta = socket.receive_json()
+        assert delta["type"] == "tasks"
+        assert delta["upserted"] == [created] and delta["deleted"] == []
+        assert delta["version"] == store.project_digests[slug]
+
+        client.delete(f"/api/project/{slug}/tasks/{created['id']}")
+        delta = socket.receive_json()
+        assert delta["upserted"] == [] and delta["deleted"] == [created["id"]]
+
+
+def test_events_diff_a_reloaded_project(project):
+    slug = project.slug
+    engine = store.engines[slug]
+    tasks = engine.get(engine.select({}))
+    changed = tasks[0].model_copy(update={"name": "Переименована"})
+
+    async def listen():
+        events = iter_events(slug)
+        try:
+            kind, _ = frame_data(await events.__anext__())
+            assert kind == "ready"
+            # A reload that renamed one task and dropped another.
+            store.replace(project, TaskEngine([changed, *tasks[2:]]))
+            delta = frame_data(await events.__anext__())
+            assert delta[1]["version"] == store.project_digests[slug]
+            store.remove(slug)
+            return delta, frame_data(await events.__anext__())
+        finally:
+            await events.aclose()
+
+    (kind, data), (removed, _) = asyncio.run(listen())
+    assert kind == "tasks"
+    assert data["upserted"] == [json.loads(task_json(task_row(changed)))]
+    assert data["deleted"] == [tasks[1].id]
+    assert removed == "removed"
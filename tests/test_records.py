@@ -0,0 +1,18 @@
+from fixtures import PROJECTS, TASKS, FixtureStore
+from records import task_json, task_row
+
+
+def test_task_json_matches_pydantic():
+    store = FixtureStore.from_data(PROJECTS, TASKS)
+    for engine in store.engines.values():
+        for task in engine.tasks:
+            assert task_json(task_row(task)) == task.model_dump_json()
+
+
+def test_generated_rows_match_pydantic():
+    # Generated tasks are encoded straight from their columns.
+    store = FixtureStore.generate(2, 2000, 3)
+    for engine in store.engines.values():
+        positions = range(len(engine.tasks))
+        expected = [task.model_dump_json() for task in engine.get(positions)]
+        assert engine.encode(positions) == expected
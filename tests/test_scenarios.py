@@ -0,0 +1,35 @@
+import pytest
+from pydantic import ValidationError
+
+from fixtures import store
+from scenarios import load_scenarios
+
+
+def test_empty_status_catalogue_is_rejected(tmp_path):
+    path = tmp_path / "scenarios.yaml"
+    path.write_text("small:\n  projects: 1\n  tasks: 10\n", encoding="utf-8")
+    assert load_scenarios(str(path))["small"].statuses is None
+    path.write_text("empty:\n  projects: 1\n  statuses: []\n", encoding="utf-8")
+    with pytest.raises(ValidationError):
+        load_scenarios(str(path))
+
+
+def test_scenario_selector_is_refused_for_writes(client):
+    slug = next(iter(store.projects))
+    project = store.projects[slug]
+    task = {
+        "name": "Задача",
+        "comment": "",
+        "section": project.sections[0].id,
+        "release": project.releases[0].id,
+        "status": project.statuses[0].id,
+        "events": [],
+    }
+    count = len(store.engines[slug])
+    response = client.post(
+        f"/api/project/{slug}/tasks", json=task, headers={"X-Mock-Scenario": "nope"}
+    )
+    assert response.status_code == 400
+    response = client.post(f"/api/project/{slug}/tasks?scenario=nope", json=task)
+    assert response.status_code == 400
+    assert len(store.engines[slug]) == count
@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+from wal import SNAPSHOT, Journal
+
+
+def task(number):
+    return '{"id":"t%d","name":"Задача %d"}' % (number, number)
+
+
+def test_snapshot_and_reload(tmp_path):
+    directory = str(tmp_path)
+
+    async def write():
+        journal = Journal(directory, snapshot_every=10)
+        journal.load()
+        for number in range(25):
+            journal.append("pik", f"t{number % 7}", task(number))
+            if journal.compacting is not None:
+                await journal.compacting
+        journal.append("alpha", "t1", task(1))
+        journal.append("pik", "t3", None)
+        journal.close()
+        return journal.state
+
+    state = asyncio.run(write())
+    # Two snapshots taken; only the log written since the last one is left.
+    assert sorted(os.listdir(directory)) == [SNAPSHOT, "wal-00000002.jsonl"]
+
+    reloaded = Journal(directory)
+    reloaded.load()
+    reloaded.close()
+    assert reloaded.state == state
+    assert reloaded.state["pik"]["t3"] is None
+    assert reloaded.state["pik"]["t6"] == task(20)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    directory = str(tmp_path)
+    journal = Journal(directory)
+    journal.load()
+    journal.append("pik", "t1", task(1))
+    journal.close()
+    with open(os.path.join(directory, "wal-00000000.jsonl"), "a") as file:
+        file.write('{"slug":"pik","id":"t2","ta')
+
+    reloaded = Journal(directory)
+    reloaded.load()
+    reloaded.append("pik", "t3", task(3))
+    reloaded.close()
+
+    again = Journal(directory)
+    again.load()
+    again.close()
+    assert again.state == {"pik": {"t1": task(1), "t3": task(3)}}
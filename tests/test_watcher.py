@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from cache import CachedResponse, ResponseCache
+from fixtures import PROJECTS, TASKS, FixtureStore
+from watcher import FixtureWatcher
+
+
+def write_fixture(path, project, tasks):
+    path.write_text(
+        json.dumps({"project": project, "tasks": tasks}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+def test_reload_evicts_only_the_changed_project(tmp_path):
+    first, second = PROJECTS[:2]
+    write_fixture(tmp_path / "first.json", first, TASKS)
+    write_fixture(tmp_path / "second.yaml", second, TASKS)
+    store = FixtureStore.from_directory(str(tmp_path))
+    store.cache = ResponseCache()
+    watcher = FixtureWatcher(store, str(tmp_path))
+    slug, other = first["slug"], second["slug"]
+
+    def cache(key):
+        store.cache.put(key, CachedResponse(b"{}", '"etag"'))
+
+    cache((store.digest, "projects"))
+    cache((store.project_digests[slug], "tasks", slug))
+    kept = (store.project_digests[other], "tasks", other)
+    cache(kept)
+    untouched = store.engines[other]
+
+    renamed = {**TASKS[0], "name": "Переименована"}
+    write_fixture(tmp_path / "first.json", first, [renamed, *TASKS[1:]])
+    asyncio.run(watcher.reload((tmp_path / "first.json").resolve()))
+    assert store.engines[slug].tasks[0].name == "Переименована"
+    assert store.engines[other] is untouched
+    assert len(store.cache) == 1 and store.cache.get(kept) is not None
+
+    # A broken file keeps the project as it was; a deleted one removes it.
+    reloaded = store.engines[slug]
+    (tmp_path / "first.json").write_text("{", encoding="utf-8")
+    asyncio.run(watcher.reload((tmp_path / "first.json").resolve()))
+    assert store.engines[slug] is reloaded
+    (tmp_path / "first.json").unlink()
+    watcher.remove((tmp_path / "first.json").resolve())
+    assert slug not in store.engines and other in store.engines
@@ -0,0 +1,65 @@
+from engine import TaskEngine
+from fixtures import FixtureStore, store
+from wal import journal
+
+
+def new_task(project, name):
+    return {
+        "name": name,
+        "comment": "",
+        "section": project.sections[0].id,
+        "release": project.releases[0].id,
+        "status": project.statuses[0].id,
+        "events": [],
+    }
+
+
+def test_writes_stay_in_their_project(client):
+    written, other = list(store.projects)[:2]
+    tasks = f"/api/project/{other}/tasks"
+    before = client.get(tasks)
+    stats = client.get(f"/api/project/{other}/stats").json()
+    count = client.get(f"/api/project/{written}/tasks").json()["count"]
+
+    created = client.post(
+        f"/api/project/{written}/tasks",
+        json=new_task(store.projects[written], "Новая задача"),
+    )
+    assert created.status_code == 201
+    task_id = created.json()["id"]
+    assert client.get(f"/api/project/{written}/tasks").json()["count"] == count + 1
+    existing = client.get(f"/api/project/{written}/tasks").json()["tasks"][0]["id"]
+    response = client.delete(f"/api/project/{written}/tasks/{existing}")
+    assert response.status_code == 204
+
+    after = client.get(tasks)
+    assert after.text == before.text
+    assert after.headers["etag"] == before.headers["etag"]
+    revalidated = client.get(tasks, headers={"If-None-Match": before.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert client.get(f"/api/project/{other}/stats").json() == stats
+    assert client.get(f"{tasks}?perPage=1000").text.find(task_id) == -1
+
+
+def test_reload_restores_journalled_writes(client):
+    generated = FixtureStore.generate(1, 200, 9)
+    slug, engine = next(iter(generated.engines.items()))
+    project = generated.projects[slug]
+    original = list(engine.tasks)
+    store.replace(project, engine)
+    try:
+        url = f"/api/project/{slug}/tasks"
+        created = client.post(url, json=new_task(project, "Задача из журнала"))
+        removed = original[0].id
+        assert client.delete(f"{url}/{removed}").status_code == 204
+        listed = client.get(url, params={"perPage": 1000}).json()
+
+        # A reload brings back the fixtures as they were on disk.
+        store.replace(project, TaskEngine(original))
+        reloaded = client.get(url, params={"perPage": 1000}).json()
+        assert reloaded == listed
+        ids = {task["id"] for task in reloaded["tasks"]}
+        assert created.json()["id"] in ids and removed not in ids
+    finally:
+        store.remove(slug)
+        journal.state.pop(slug, None)
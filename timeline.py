@@ -0,0 +1,177 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import partial
+from itertools import accumulate, repeat
+from operator import add, mul, sub
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models import Task
+
+GROUPS = ("risk", "type", "responsible")
+# Day ordinals run to 3652059 (9999-12-31), so fit in 22 bits.
+DAY_BITS = 22
+
+# (codes, labels): codes[i] is the group of event i, an index into labels.
+Grouping = Tuple[Sequence[int], List[str]]
+EventColumns = Tuple[Sequence[int], Sequence[int], Dict[str, Grouping]]
+EventKey = Tuple[int, int, str, str, str]
+
+
+def event_keys(task: Task) -> List[EventKey]:
+    return [
+        (
+            event.startedAt.toordinal(),
+            event.endedAt.toordinal(),
+            event.risk,
+            event.type,
+            event.responsible,
+        )
+        for event in task.events
+    ]
+
+
+def event_columns(tasks: Sequence[Task]) -> EventColumns:
+    # Every event's start/end ordinals and group codes, column-wise.
+    if hasattr(tasks, "event_columns"):
+        return tasks.event_columns()
+    starts = array("i")
+    ends = array("i")
+    codes: Dict[str, array] = {group: array("I") for group in GROUPS}
+    labels: Dict[str, Dict[str, int]] = {group: {} for group in GROUPS}
+    for task in tasks:
+        for key in event_keys(task):
+            starts.append(key[0])
+            ends.append(key[1])
+            for group, label in zip(GROUPS, key[2:]):
+                known = labels[group]
+                code = known.get(label)
+                if code is None:
+                    code = known[label] = len(known)
+                codes[group].append(code)
+    return starts, ends, {
+        group: (codes[group], list(labels[group])) for group in GROUPS
+    }
+
+
+class Intervals:
+    # Start and end days of a set of events, as sorted arrays run-length
+    # encoded by day: event days span a few hundred distinct dates however
+    # many events there are. The events overlapping [first, last] are those
+    # starting on or before last minus those that ended before first (which
+    # necessarily started before it too).
+    __slots__ = ("starts", "ends", "count", "_runs")
+
+    def __init__(self, starts: Counter, ends: Counter):
+        self.starts = starts
+        self.ends = ends
+        self.count = sum(starts.values())
+        self._runs: Optional[Tuple[array, array, array, array]] = None
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def runs(self) -> Tuple[array, array, array, array]:
+        # (start days, starts up to each, end days, ends up to each), with
+        # the running totals offset by one so a bisect indexes them directly.
+        if self._runs is None:
+            runs = []
+            for counter in (self.starts, self.ends):
+                days = array("i", sorted(counter))
+                totals = accumulate(map(counter.__getitem__, days), initial=0)
+                runs.append(days)
+                runs.append(array("q", totals))
+            self._runs = tuple(runs)
+        return self._runs
+
+    def span(self) -> Tuple[int, int]:
+        start_days, _, end_days, _ = self.runs()
+        return start_days[0], end_days[-1]
+
+    def overlapping(self, first: int, last: int) -> int:
+        start_days, started, end_days, ended = self.runs()
+        before = ended[bisect_left(end_days, first)]
+        return started[bisect_right(start_days, last)] - before
+
+    def buckets(self, firsts: List[int], lasts: List[int]) -> List[int]:
+        # A couple of C-level bisects per bucket, no per-event work.
+        start_days, started, end_days, ended = self.runs()
+        up_to = map(partial(bisect_right, start_days), lasts)
+        before = map(partial(bisect_left, end_days), firsts)
+        return list(
+            map(sub, map(started.__getitem__, up_to), map(ended.__getitem__, before))
+        )
+
+    def add(self, start: int, end: int) -> None:
+        self.starts[start] += 1
+        self.ends[end] += 1
+        self.count += 1
+        self._runs = None
+
+    def remove(self, start: int, end: int) -> None:
+        for counter, day in ((self.starts, start), (self.ends, end)):
+            counter[day] -= 1
+            if not counter[day]:
+                del counter[day]
+        self.count -= 1
+        self._runs = None
+
+
+def grouped(codes: Sequence[int], days: Sequence[int]) -> Dict[int, Counter]:
+    # Counts per (code, day) in C, by packing both into one integer.
+    keys = map(add, map(mul, codes, repeat(1 << DAY_BITS)), days)
+    counters: Dict[int, Counter] = {}
+    for key, count in Counter(keys).items():
+        code, day = divmod(key, 1 << DAY_BITS)
+        counters.setdefault(code, Counter())[day] = count
+    return counters
+
+
+class TimelineIndex:
+    def __init__(self, total: Intervals, groups: Dict[str, Dict[str, Intervals]]):
+        self.total = total
+        self.groups = groups
+
+    @classmethod
+    def build(cls, tasks: Sequence[Task]) -> "TimelineIndex":
+        starts, ends, groupings = event_columns(tasks)
+        groups: Dict[str, Dict[str, Intervals]] = {}
+        for group, (codes, labels) in groupings.items():
+            group_starts = grouped(codes, starts)
+            group_ends = grouped(codes, ends)
+            groups[group] = {
+                labels[code]: Intervals(counter, group_ends[code])
+                for code, counter in group_starts.items()
+            }
+        # Every event has exactly one risk, so the totals are the sum of
+        # the risk groups rather than another pass over every event.
+        total_starts: Counter = Counter()
+        total_ends: Counter = Counter()
+        for intervals in groups[GROUPS[0]].values():
+            total_starts.update(intervals.starts)
+            total_ends.update(intervals.ends)
+        return cls(Intervals(total_starts, total_ends), groups)
+
+    def span(self) -> Optional[Tuple[int, int]]:
+        return self.total.span() if self.total else None
+
+    def update(self, previous: Optional[Task], task: Optional[Task]) -> None:
+        before = Counter(event_keys(previous) if previous is not None else ())
+        after = Counter(event_keys(task) if task is not None else ())
+        for key, count in (before - after).items():
+            for _ in range(count):
+                self._apply(key, Intervals.remove)
+        for key, count in (after - before).items():
+            for _ in range(count):
+                self._apply(key, Intervals.add)
+
+    def _apply(self, key: EventKey, change) -> None:
+        start, end = key[0], key[1]
+        change(self.total, start, end)
+        for group, label in zip(GROUPS, key[2:]):
+            intervals = self.groups[group].get(label)
+            if intervals is None:
+                intervals = self.groups[group][label] = Intervals(Counter(), Counter())
+            change(intervals, start, end)
+            if not intervals:
+                del self.groups[group][label]
@@ -0,0 +1,149 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+from json.encoder import encode_basestring as quote
+from typing import IO, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = "snapshot.jsonl"
+
+# The net effect of every write: per project slug, task id -> task JSON,
+# or None for a deleted task. Replaying it over freshly loaded fixtures
+# restores the written state whatever order the writes came in.
+State = Dict[str, Dict[str, Optional[str]]]
+
+
+def log_path(directory: str, generation: int) -> str:
+    return os.path.join(directory, f"wal-{generation:08d}.jsonl")
+
+
+def record_json(slug: str, task_id: str, text: Optional[str]) -> str:
+    return '{"slug":%s,"id":%s,"task":%s}\n' % (
+        quote(slug),
+        quote(task_id),
+        "null" if text is None else text,
+    )
+
+
+def task_text(task: Optional[dict]) -> Optional[str]:
+    if task is None:
+        return None
+    # Same compact encoding the task was logged with.
+    return json.dumps(task, ensure_ascii=False, separators=(",", ":"))
+
+
+class Journal:
+    # Writes are appended to wal-<generation>.jsonl. Every snapshot_every
+    # records the log rolls over to a new generation and the folded state
+    # is written, off the event loop, to a snapshot covering every older
+    # generation, which are then removed. Startup reads the snapshot and
+    # replays only the logs written since.
+    def __init__(self, directory: Optional[str], snapshot_every: int = 10000):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.state: State = {}
+        self.generation = 0
+        self.pending = 0
+        self.log: Optional[IO[str]] = None
+        self.compacting: Optional[asyncio.Task] = None
+
+    def fold(self, slug: str, task_id: str, text: Optional[str]) -> None:
+        self.state.setdefault(slug, {})[task_id] = text
+
+    def load(self) -> None:
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot = os.path.join(self.directory, SNAPSHOT)
+        if os.path.exists(snapshot):
+            with open(snapshot, encoding="utf-8") as file:
+                self.generation = json.loads(file.readline())["generation"]
+                for line in file:
+                    record = json.loads(line)
+                    text = task_text(record["task"])
+                    self.fold(record["slug"], record["id"], text)
+
+        for path in sorted(glob.glob(os.path.join(self.directory, "wal-*.jsonl"))):
+            generation = int(os.path.basename(path)[4:-6])
+            if generation >= self.generation:
+                self.generation = generation
+                self.replay(path)
+        self.log = open(
+            log_path(self.directory, self.generation), "a", encoding="utf-8"
+        )
+
+    def replay(self, path: str) -> None:
+        with open(path, "rb+") as file:
+            data = file.read()
+            good = 0
+            for line in data.splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.fold(record["slug"], record["id"], task_text(record["task"]))
+                good += len(line)
+            if good < len(data):
+                # A write torn by a crash; later appends must not follow it.
+                torn = len(data) - good
+                logger.warning("wal: dropping %d torn bytes from %s", torn, path)
+                file.truncate(good)
+
+    def append(self, slug: str, task_id: str, text: Optional[str]) -> None:
+        self.fold(slug, task_id, text)
+        if self.log is None:
+            return
+        # Flushed, not fsynced: a write survives the process dying, and
+        # thousands of writes a second stay cheap.
+        self.log.write(record_json(slug, task_id, text))
+        self.log.flush()
+        self.pending += 1
+        if self.pending >= self.snapshot_every and self.compacting is None:
+            self.compacting = asyncio.get_running_loop().create_task(self.compact())
+
+    async def compact(self) -> None:
+        try:
+            self.generation += 1
+            self.pending = 0
+            previous = self.log
+            self.log = open(
+                log_path(self.directory, self.generation), "a", encoding="utf-8"
+            )
+            previous.close()
+            # Copied on the loop so later writes cannot change it mid-write.
+            state = {slug: dict(tasks) for slug, tasks in self.state.items()}
+            await asyncio.to_thread(self.write_snapshot, self.generation, state)
+        except Exception:
+            logger.exception("wal: snapshot failed")
+        finally:
+            self.compacting = None
+
+    def write_snapshot(self, generation: int, state: State) -> None:
+        path = os.path.join(self.directory, SNAPSHOT)
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write('{"generation":%d}\n' % generation)
+            for slug, tasks in state.items():
+                for task_id, text in tasks.items():
+                    file.write(record_json(slug, task_id, text))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        for log in glob.glob(os.path.join(self.directory, "wal-*.jsonl")):
+            if int(os.path.basename(log)[4:-6]) < generation:
+                os.remove(log)
+
+    def close(self) -> None:
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+
+journal = Journal(
+    os.environ.get("MOCK_WAL_DIR"), int(os.environ.get("MOCK_WAL_SNAPSHOT", "10000"))
+)
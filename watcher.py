@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+from hashlib import blake2b
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import yaml
+from pydantic import ValidationError
+
+from cache import evict_project
+from engine import TaskEngine
+from models import Project, Task
+
+if TYPE_CHECKING:
+    from fixtures import FixtureStore
+
+logger = logging.getLogger(__name__)
+
+SUFFIXES = {".json", ".yaml", ".yml"}
+
+
+def load_file(path: Path) -> Tuple[Project, TaskEngine]:
+    raw = path.read_bytes()
+    if path.suffix == ".json":
+        data = json.loads(raw)
+    else:
+        # YAML turns bare dates into date objects; the models expect the
+        # same strings the JSON fixtures carry.
+        data = json.loads(json.dumps(yaml.safe_load(raw), default=str))
+    project = Project.model_validate(data["project"])
+    tasks = tuple(Task.model_validate(task) for task in data.get("tasks", ()))
+    digest = blake2b(raw, digest_size=16).hexdigest()
+    return project, TaskEngine(tasks, digest=digest)
+
+
+def fixture_files(directory: Path) -> List[Path]:
+    return sorted(
+        path
+        for path in directory.iterdir()
+        if path.suffix in SUFFIXES and path.is_file()
+    )
+
+
+def load_directory(
+    directory: str, files: Optional[Dict[Path, str]] = None
+) -> Tuple[List[Project], Dict[str, TaskEngine]]:
+    projects = []
+    engines = {}
+    for path in fixture_files(Path(directory)):
+        project, engine = load_file(path)
+        projects.append(project)
+        engines[project.slug] = engine
+        if files is not None:
+            files[path.resolve()] = project.slug
+    return projects, engines
+
+
+class FixtureWatcher:
+    def __init__(self, store: "FixtureStore", directory: str):
+        self.store = store
+        self.directory = Path(directory).resolve()
+        # Which project each file defines, so deletions and slug changes
+        # can be applied without re-reading the rest of the directory.
+        self.files: Dict[Path, str] = dict(store.source_files)
+        self.stopped = asyncio.Event()
+
+    async def run(self) -> None:
+        from watchfiles import Change, awatch
+
+        async for changes in awatch(self.directory, stop_event=self.stopped):
+            for change, name in sorted(changes, key=lambda item: item[1]):
+                path = Path(name).resolve()
+                if path.suffix not in SUFFIXES:
+                    continue
+                if change == Change.deleted:
+                    self.remove(path)
+                else:
+                    await self.reload(path)
+
+    def remove(self, path: Path) -> None:
+        slug = self.files.pop(path, None)
+        if slug is None or slug in self.files.values():
+            return
+        evict_project(self.store, slug)
+        self.store.remove(slug)
+        logger.info("fixtures: removed project %s (%s)", slug, path.name)
+
+    async def reload(self, path: Path) -> None:
+        try:
+            # Parsing and index building run off the event loop; only the
+            # swap below happens on it, so requests keep flowing meanwhile.
+            project, engine = await asyncio.to_thread(load_file, path)
+        except FileNotFoundError:
+            self.remove(path)
+            return
+        except (OSError, ValueError, KeyError, ValidationError, yaml.YAMLError) as exc:
+            logger.warning("fixtures: keeping previous %s: %s", path.name, exc)
+            return
+
+        previous = self.files.get(path)
+        if previous is not None and previous != project.slug:
+            self.remove(path)
+        self.files[path] = project.slug
+        evict_project(self.store, project.slug)
+        self.store.replace(project, engine)
+        logger.info("fixtures: reloaded project %s (%s)", project.slug, path.name)
@@ -0,0 +1,242 @@
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Response
+
+from cache import evict_project
+from engine import TaskEngine
+from fixtures import store
+from models import (
+    Event,
+    EventInput,
+    EventPatch,
+    Project,
+    Task,
+    TaskInput,
+    TaskPatch,
+)
+from push import delta_body, hub
+from records import task_json, task_row
+from scenarios import default_only
+from wal import journal
+
+router = APIRouter(dependencies=[Depends(default_only)])
+
+
+async def project_engine(slug: str) -> Tuple[Project, TaskEngine]:
+    # Ids are derived off the event loop, so the first write never stalls
+    # readers.
+    engine = await store.loaded(slug, TaskEngine.load_ids)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return store.projects[slug], engine
+
+
+def find_task(engine: TaskEngine, task_id: str) -> Task:
+    position = engine.position(task_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return engine.tasks[position]
+
+
+def find_event(task: Task, event_id: str) -> int:
+    for index, event in enumerate(task.events):
+        if event.id == event_id:
+            return index
+    raise HTTPException(status_code=404, detail="Event not found")
+
+
+def check_reference(kind: str, value: str, known: List[str]) -> None:
+    if value not in known:
+        raise HTTPException(status_code=422, detail=f"Unknown {kind}: {value}")
+
+
+def make_event(project: Project, data: dict) -> Event:
+    check_reference(
+        "responsible",
+        data["responsible"],
+        [responsible.id for responsible in project.responsibles],
+    )
+    if data["endedAt"] < data["startedAt"]:
+        raise HTTPException(status_code=422, detail="endedAt is before startedAt")
+    return Event(**{**data, "id": data.get("id") or str(uuid.uuid4())})
+
+
+def make_task(project: Project, data: dict) -> Task:
+    check_reference(
+        "section", data["section"], [section.id for section in project.sections]
+    )
+    check_reference(
+        "release", data["release"], [release.id for release in project.releases]
+    )
+    statuses = {status.id: status for status in project.statuses}
+    check_reference("status", data["status"], list(statuses))
+    events = [make_event(project, event) for event in data["events"]]
+    if len({event.id for event in events}) < len(events):
+        raise HTTPException(status_code=422, detail="Duplicate event id")
+    return Task(
+        **{
+            **data,
+            "id": data.get("id") or str(uuid.uuid4()),
+            "status": statuses[data["status"]],
+            "events": events,
+        }
+    )
+
+
+def task_data(task: Task) -> dict:
+    # A task as its input model, so patches are validated like creates.
+    data = task.model_dump()
+    data["status"] = task.status.id
+    return data
+
+
+def apply(engine: TaskEngine, task_id: str, task: Optional[Task]) -> None:
+    position = engine.position(task_id)
+    if task is None:
+        if position is not None:
+            engine.delete(position)
+    elif position is None:
+        engine.insert(task)
+    else:
+        engine.update(position, task)
+
+
+def commit(project: Project, engine: TaskEngine, task_id: str, task: Optional[Task]):
+    # Writes run synchronously on the event loop, so readers never wait on
+    # a lock and never see a half-applied write. The engine's indexes are
+    # copy-on-write, so exports already streaming keep their view.
+    slug = project.slug
+    evict_project(store, slug)
+    apply(engine, task_id, task)
+    store.written(slug)
+    if task is None:
+        journal.append(slug, task_id, None)
+        hub.publish("tasks", slug, delta_body((), (task_id,)))
+        return None
+    text = task_json(task_row(task))
+    journal.append(slug, task_id, text)
+    hub.publish("tasks", slug, delta_body((text,), ()))
+    return text
+
+
+def restore(slug: str) -> None:
+    # Replays journalled writes over the project's current engine.
+    engine = store.engines[slug]
+    for task_id, text in journal.state[slug].items():
+        task = None if text is None else Task.model_validate_json(text)
+        apply(engine, task_id, task)
+    store.written(slug)
+
+
+def on_store_change(
+    slug: str, previous: Optional[TaskEngine], engine: Optional[TaskEngine]
+) -> None:
+    # A fixture reload brings back the original tasks; put the writes back.
+    if engine is not None and previous is not engine and journal.state.get(slug):
+        restore(slug)
+
+
+journal.load()
+for slug in journal.state:
+    if slug in store.engines:
+        restore(slug)
+# First, so every other listener (the push hub's diff among them) sees the
+# reloaded project with its writes already back in place.
+store.listeners.insert(0, on_store_change)
+
+
+def json_response(text: str, status_code: int = 200) -> Response:
+    return Response(
+        content=text, media_type="application/json", status_code=status_code
+    )
+
+
+@router.post("/api/project/{slug}/tasks", response_model=Task, status_code=201)
+async def create_task(
+    body: TaskInput, slug: str = Path(..., description="The slug of the project")
+):
+    project, engine = await project_engine(slug)
+    task = make_task(project, body.model_dump())
+    if engine.position(task.id) is not None:
+        raise HTTPException(status_code=409, detail="Task already exists")
+    return json_response(commit(project, engine, task.id, task), 201)
+
+
+@router.patch("/api/project/{slug}/tasks/{task_id}", response_model=Task)
+async def update_task(
+    body: TaskPatch,
+    slug: str = Path(..., description="The slug of the project"),
+    task_id: str = Path(..., description="The ID of the task"),
+):
+    project, engine = await project_engine(slug)
+    data = task_data(find_task(engine, task_id))
+    data.update(body.model_dump(exclude_none=True))
+    task = make_task(project, data)
+    return json_response(commit(project, engine, task_id, task))
+
+
+@router.delete("/api/project/{slug}/tasks/{task_id}", status_code=204)
+async def delete_task(
+    slug: str = Path(..., description="The slug of the project"),
+    task_id: str = Path(..., description="The ID of the task"),
+):
+    project, engine = await project_engine(slug)
+    find_task(engine, task_id)
+    commit(project, engine, task_id, None)
+    return Response(status_code=204)
+
+
+@router.post(
+    "/api/project/{slug}/tasks/{task_id}/events",
+    response_model=Event,
+    status_code=201,
+)
+async def create_event(
+    body: EventInput,
+    slug: str = Path(..., description="The slug of the project"),
+    task_id: str = Path(..., description="The ID of the task"),
+):
+    project, engine = await project_engine(slug)
+    data = task_data(find_task(engine, task_id))
+    event = make_event(project, body.model_dump())
+    if any(existing["id"] == event.id for existing in data["events"]):
+        raise HTTPException(status_code=409, detail="Event already exists")
+    data["events"].append(event.model_dump())
+    commit(project, engine, task_id, make_task(project, data))
+    return json_response(event.model_dump_json(), 201)
+
+
+@router.patch(
+    "/api/project/{slug}/tasks/{task_id}/events/{event_id}", response_model=Event
+)
+async def update_event(
+    body: EventPatch,
+    slug: str = Path(..., description="The slug of the project"),
+    task_id: str = Path(..., description="The ID of the task"),
+    event_id: str = Path(..., description="The ID of the event"),
+):
+    project, engine = await project_engine(slug)
+    task = find_task(engine, task_id)
+    index = find_event(task, event_id)
+    data = task_data(task)
+    data["events"][index].update(body.model_dump(exclude_none=True))
+    updated = make_task(project, data)
+    commit(project, engine, task_id, updated)
+    return json_response(updated.events[index].model_dump_json())
+
+
+@router.delete(
+    "/api/project/{slug}/tasks/{task_id}/events/{event_id}", status_code=204
+)
+async def delete_event(
+    slug: str = Path(..., description="The slug of the project"),
+    task_id: str = Path(..., description="The ID of the task"),
+    event_id: str = Path(..., description="The ID of the event"),
+):
+    project, engine = await project_engine(slug)
+    task = find_task(engine, task_id)
+    data = task_data(task)
+    del data["events"][find_event(task, event_id)]
+    commit(project, engine, task_id, make_task(project, data))
+    return Response(status_code=204)